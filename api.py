@@ -1,22 +1,955 @@
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import math
+import mimetypes
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from fastapi import FastAPI, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from logic.models import create_reservation
+from starlette.requests import ClientDisconnect
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
+from assets import find_asset, get_manifest
+from db.changes import ChangeTracker
+from db.database import get_context, close_connection
+from db.instrumentation import registry
+from db.migrations import migrate
+from db.writer import DatabaseWriter, WriterBusy, DEFAULT_WRITE_QUEUE, DEFAULT_WRITE_TIMEOUT, DEFAULT_BATCH_WINDOW_MS, DEFAULT_BATCH_ROWS
+from db.timeutil import now_epoch, ph_offset
+from logic.assignment import vehicle_class
+from logic.models import create_reservation, get_time_slot_availability, get_reservations_by_id, get_slot_states, RESERVATION_TIMES
 
-app = FastAPI()
+# Fields a reservation needs, in create_reservation's argument order
+RESERVATION_FIELDS = ("name", "owner_type", "email", "contact_number", "plate_number", "vehicle_type", "reservation_date", "reservation_time")
+# Lines one /api/reservations/bulk request may carry
+MAX_BULK_ROWS = 10000
+# Bytes one of its lines may take; a reservation is a few hundred
+MAX_BULK_LINE_BYTES = 64 * 1024
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """The process's DatabaseWriter, configured from the USA_PARKING_WRITE_* settings."""
+    global _writer
+
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                context = get_context()
+                _writer = DatabaseWriter(int(context.getenv("USA_PARKING_WRITE_QUEUE", DEFAULT_WRITE_QUEUE)),
+                                         float(context.getenv("USA_PARKING_WRITE_TIMEOUT", DEFAULT_WRITE_TIMEOUT)),
+                                         float(context.getenv("USA_PARKING_WRITE_BATCH_MS", DEFAULT_BATCH_WINDOW_MS)),
+                                         int(context.getenv("USA_PARKING_WRITE_BATCH_ROWS", DEFAULT_BATCH_ROWS)))
+
+    return _writer
+
+
+# Default limits as (tokens per minute, burst): what one address may POST, and what one plate may book
+DEFAULT_IP_LIMIT = (30, 10)
+DEFAULT_PLATE_LIMIT = (3, 3)
+# Posting endpoints the per-address limit covers
+LIMITED_PATHS = ("/submit", "/api/reservations", "/api/reservations/bulk")
+# Share of max_keys a limiter trims down to once it has to drop buckets that are not yet full
+EVICT_TO = 0.9
+
+
+class TokenBucketLimiter:
+    """Token buckets per key, refilled lazily when the key is next seen.
+
+    A bucket is only (tokens, last seen) in a dict. Buckets that have been
+    idle long enough to refill completely are indistinguishable from new
+    ones, so they are swept out whenever the dict outgrows `max_keys`;
+    if a flood of distinct keys still leaves it too big, the oldest go
+    until it is down to EVICT_TO of `max_keys`, so a sweep is not due
+    again on the very next new key.
+    """
+
+    def __init__(self, per_minute, burst, max_keys=100000):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.shed = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """0 if `key` may go ahead (spending a token), else seconds until it may."""
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self.allowed += 1
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                self.shed += 1
+                wait = (1 - tokens) / self.rate if self.rate else math.inf
+
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+
+            return wait
+
+    def _evict(self, now):
+        full = self.burst / self.rate if self.rate else math.inf
+
+        for key in [key for key, (_, last) in self._buckets.items() if now - last >= full]:
+            del self._buckets[key]
+
+        # Re-inserted on every take, so the dict is in last-seen order.
+        keep = int(self.max_keys * EVICT_TO)
+        for key in list(self._buckets)[:max(0, len(self._buckets) - keep)]:
+            del self._buckets[key]
+
+    def stats(self):
+        with self._lock:
+            return {"per_minute": round(self.rate * 60, 3), "burst": self.burst, "allowed": self.allowed,
+                    "shed": self.shed, "tracked": len(self._buckets)}
+
+
+_limiters = None
+_limiters_lock = threading.Lock()
+
+
+def parse_limit(name, default):
+    """(per_minute, burst) from the USA_PARKING_<NAME>_LIMIT setting, or `default` when unset."""
+    setting = get_context().getenv(f"USA_PARKING_{name.upper()}_LIMIT")
+
+    if not setting:
+        return default
+
+    try:
+        per_minute, burst = (float(part) for part in setting.split("/"))
+    except ValueError:
+        per_minute = burst = None
+
+    if per_minute is None or per_minute < 0 or burst < 1:
+        raise ValueError(f"USA_PARKING_{name.upper()}_LIMIT must be per_minute/burst with burst at least 1, e.g. 30/10; got {setting!r}")
+
+    return per_minute, burst
+
+
+def get_limiters():
+    """{"ip": ..., "plate": ...} limiters from USA_PARKING_IP_LIMIT / USA_PARKING_PLATE_LIMIT ("per_minute/burst")."""
+    global _limiters
+
+    if _limiters is None:
+        with _limiters_lock:
+            if _limiters is None:
+                _limiters = {name: TokenBucketLimiter(*parse_limit(name, default))
+                             for name, default in (("ip", DEFAULT_IP_LIMIT), ("plate", DEFAULT_PLATE_LIMIT))}
+
+    return _limiters
+
+
+def retry_after(wait):
+    return str(max(1, math.ceil(min(wait, 86400))))
+
+
+# Seconds between the slot stream's change checks, and between keep-alives to idle subscribers
+DEFAULT_STREAM_POLL = 1
+STREAM_KEEPALIVE = 15
+# Deltas kept for subscribers that fall behind or reconnect with Last-Event-ID
+STREAM_BACKLOG = 256
+STREAM_TABLES = ("parking_slots", "reservations", "accepted_reservations")
+
+
+class SlotStream:
+    """Slot states for every /stream/slots subscriber, kept by one shared loop.
+
+    The loop asks a ChangeTracker (one PRAGMA while nothing is written) on
+    its own thread every `interval` seconds, and re-reads the slots only
+    when a table changed or a reservation's countdown window opens or
+    closes. Each new state is diffed against the last and published as a
+    numbered delta; subscribers just wait on an asyncio.Event, so an idle
+    one costs a parked coroutine and no queries.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        # Event ids carry the boot time, so ids from before a restart are never taken for current ones.
+        self.boot = int(time.time())
+        self.version = 0
+        self.states = {}
+        self.subscribers = 0
+        self._deltas = deque(maxlen=STREAM_BACKLOG)
+        self._changed = asyncio.Event()
+        self._tracker = ChangeTracker()
+        self._next_change = None
+        self._executor = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="slot-stream")
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._executor.submit(close_connection)
+            self._executor.shutdown(wait=False)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                states = await loop.run_in_executor(self._executor, self._poll)
+
+                if states is not None:
+                    self._publish(states)
+            except Exception as e:
+                print("Error Occurred!", e)
+
+            await asyncio.sleep(self.interval)
+
+    def _poll(self):
+        changed = self._tracker.changed(*STREAM_TABLES)
+
+        if not changed and self.version and (self._next_change is None or now_epoch() < self._next_change):
+            return None
+
+        result = get_slot_states()
+
+        if result is None:
+            return None
+
+        states, self._next_change = result
+        return states
+
+    def _publish(self, states):
+        delta = {slot: state for slot, state in states.items() if self.states.get(slot) != state}
+        delta.update({slot: None for slot in self.states if slot not in states})
+
+        if not delta and self.version:
+            return
+
+        self.version += 1
+        self.states = states
+        self._deltas.append((self.version, delta))
+
+        # Wake everyone waiting on the old event; later waiters get a fresh one.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, version, timeout):
+        """Return once there is something newer than `version`, or after `timeout` seconds."""
+        if self.version != version:
+            return
+
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def since(self, version):
+        """Slots changed after `version` merged into one delta, or None if the backlog does not reach back."""
+        if not self._deltas or version < self._deltas[0][0] - 1 or version > self.version:
+            return None
+
+        merged = {}
+        for number, delta in self._deltas:
+            if number > version:
+                merged.update(delta)
+
+        return merged
+
+    def event_id(self):
+        return f"{self.boot}-{self.version}"
+
+    def parse_event_id(self, event_id):
+        boot, _, version = (event_id or "").partition("-")
+
+        if boot == str(self.boot) and version.isdigit():
+            return int(version)
+
+        return None
+
+
+_slot_stream = None
+
+
+def get_slot_stream():
+    global _slot_stream
+
+    if _slot_stream is None:
+        _slot_stream = SlotStream(float(get_context().getenv("USA_PARKING_STREAM_POLL", DEFAULT_STREAM_POLL)))
+
+    _slot_stream.start()
+    return _slot_stream
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """A StreamingResponse for handlers that keep reading the request body while it is sent.
+
+    Under ASGI spec versions before 2.4 (uvicorn's included), Starlette's
+    watches for a disconnect by reading the request's receive channel,
+    which would take body chunks away from the handler. Here a disconnect
+    ends the body stream instead, or fails the next send.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+def sse(event, event_id, data):
+    return f"event: {event}\nid: {event_id}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # The desktop app may not have run since an upgrade, so bring the schema up to date before serving.
+    await run_in_threadpool(migrate, get_context().manager)
+    # Read the rate limits now, so a malformed setting stops the server instead of failing every POST.
+    get_limiters()
+
+    yield
+
+    if _slot_stream is not None:
+        await _slot_stream.stop()
+
+    # Let queued reservations finish before the process goes away.
+    if _writer is not None:
+        await run_in_threadpool(_writer.shutdown)
+
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory="templates")
 
+
+@app.middleware("http")
+async def limit_posts_per_address(request: Request, call_next):
+    if request.method == "POST" and request.url.path in LIMITED_PATHS:
+        wait = get_limiters()["ip"].take(request.client.host if request.client else "unknown")
+
+        if wait:
+            headers = {"Retry-After": retry_after(wait)}
+
+            if request.url.path == "/submit":
+                response = form_page(429, error="Too many submissions from your network. Please wait a minute and try again.")
+                response.headers.update(headers)
+                return response
+
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers=headers)
+
+    return await call_next(request)
+
+# Seconds an /availability answer is reused before the lot is asked again
+DEFAULT_AVAILABILITY_TTL = 5
+# Days ahead, counting today, that reservations and /availability accept
+DEFAULT_BOOKING_DAYS = 60
+
+_availability_cache = {}
+_availability_lock = threading.Lock()
+
+# Rendered reservation pages by (message, error); the messages come from this module, so they are few
+MAX_CACHED_PAGES = 64
+# Fingerprinted files never change under the same name
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_pages = {}
+_pages_lock = threading.Lock()
+
+# Seconds a submitted request's result is remembered, and how many are kept
+DEFAULT_DEDUPE_TTL = 600
+DEDUPE_ENTRIES = 10000
+
+_recent_requests = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def booking_date_error(reservation_date):
+    """Why a YYYY-MM-DD date cannot be booked, or None if it is within the booking window."""
+    try:
+        day = datetime.strptime(str(reservation_date), "%Y-%m-%d").date()
+    except ValueError:
+        return "Please pick a valid date."
+
+    days = int(get_context().getenv("USA_PARKING_BOOKING_DAYS", DEFAULT_BOOKING_DAYS))
+    today = datetime.now(ph_offset).date()
+
+    if not today <= day < today + timedelta(days=days):
+        return f"Please pick a date within the next {days} days."
+
+    return None
+
+
+def cached_availability(reservation_date, vehicle_type=None):
+    """(etag, slots) for a day, recomputed at most once per USA_PARKING_AVAILABILITY_TTL seconds."""
+    ttl = float(get_context().getenv("USA_PARKING_AVAILABILITY_TTL", DEFAULT_AVAILABILITY_TTL))
+    # Keyed by vehicle class, not the free-form type, so the cache cannot grow past days x classes.
+    vehicle_type = vehicle_class(vehicle_type) if vehicle_type else None
+    key = (reservation_date, vehicle_type)
+
+    with _availability_lock:
+        entry = _availability_cache.get(key)
+
+        if entry and entry[0] > time.monotonic():
+            return entry[1], entry[2]
+
+        slots = get_time_slot_availability(reservation_date, vehicle_type)
+
+        if slots is None:
+            return None, None
+
+        etag = '"' + hashlib.sha1(json.dumps(slots).encode("utf-8")).hexdigest() + '"'
+
+        # Drop expired days so the cache stays as small as the dates people are looking at.
+        now = time.monotonic()
+        for stale in [k for k, v in _availability_cache.items() if v[0] <= now]:
+            del _availability_cache[stale]
+
+        _availability_cache[key] = (now + ttl, etag, slots)
+
+        return etag, slots
+
+
+def render_form(message=None, error=None):
+    """(etag, html, gzipped html) of the reservation page, rendered once per message and kept."""
+    key = (message, error)
+    page = _pages.get(key)
+
+    if page is None:
+        html = templates.get_template("reservation_form.html").render(assets=get_manifest(), message=message, error=error).encode("utf-8")
+        page = ('"' + hashlib.sha1(html).hexdigest() + '"', html, gzip.compress(html, compresslevel=9, mtime=0))
+
+        with _pages_lock:
+            if len(_pages) < MAX_CACHED_PAGES:
+                _pages[key] = page
+
+    return page
+
+
+def form_page(status_code=200, message=None, error=None):
+    etag, html, _ = render_form(message, error)
+    return HTMLResponse(html, status_code=status_code, headers={"ETag": etag})
+
+
+def normalize_plate(plate_number):
+    return "".join(str(plate_number).split()).upper()
+
+
+def request_key(fields, token=None):
+    """Idempotency key of a submission: the client's token, or else plate, date and time."""
+    if token:
+        return "token:" + str(token)[:128]
+
+    return "sha1:" + hashlib.sha1(f"{normalize_plate(fields['plate_number'])}|{fields['reservation_date']}|{fields['reservation_time']}".encode("utf-8")).hexdigest()
+
+
+def recall_request(key):
+    """Reservation id an earlier submission with this key was saved as, if still remembered."""
+    with _recent_lock:
+        entry = _recent_requests.get(key)
+
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            del _recent_requests[key]
+            return None
+
+        _recent_requests.move_to_end(key)
+        return entry[1]
+
+
+def forget_request(key):
+    with _recent_lock:
+        _recent_requests.pop(key, None)
+
+
+def earlier_reservation(key):
+    """The row an earlier submission with this key created, if remembered and the row still holds the key.
+
+    Rejecting a reservation clears its key, so the same submission can be
+    made again; the stale memory of it is dropped here.
+    """
+    reservation_id = recall_request(key)
+
+    if not reservation_id:
+        return None
+
+    row = get_reservations_by_id([reservation_id]).get(reservation_id)
+
+    if row is None or row[17] != key:
+        forget_request(key)
+        return None
+
+    return row
+
+
+def remember_request(key, reservation_id):
+    ttl = float(get_context().getenv("USA_PARKING_DEDUPE_TTL", DEFAULT_DEDUPE_TTL))
+
+    with _recent_lock:
+        _recent_requests[key] = (time.monotonic() + ttl, reservation_id)
+        _recent_requests.move_to_end(key)
+
+        while len(_recent_requests) > DEDUPE_ENTRIES:
+            _recent_requests.popitem(last=False)
+
+
+def create_reservation_row(key, *values):
+    reservation_id = create_reservation(*values, request_key=key)
+
+    if not reservation_id:
+        return None
+
+    return get_reservations_by_id([reservation_id]).get(reservation_id)
+
+
+def save_reservation(fields, key):
+    """Queue a validated reservation on the writer; a concurrent.futures.Future of its row.
+
+    The unique index on request_key makes a repeat that gets past the
+    in-memory cache (a double click landing in the same batch, or another
+    worker process) come back with the original row, in whatever status it
+    now has, instead of a new one.
+    """
+    def saved(future):
+        if future.exception() is None and future.result():
+            remember_request(key, future.result()[0])
+
+    future = get_writer().submit(create_reservation_row, key, *(str(fields[field]) for field in RESERVATION_FIELDS))
+    future.add_done_callback(saved)
+    return future
+
+
+def plate_wait(fields):
+    """Seconds the plate must wait before booking again, 0 if it may now."""
+    return get_limiters()["plate"].take(normalize_plate(fields["plate_number"]))
+
+
+def reservation_error(fields):
+    """What is wrong with a submitted reservation, or None if it can be saved."""
+    not_text = [field for field in (*RESERVATION_FIELDS, "request_key") if fields.get(field) is not None and not isinstance(fields[field], str)]
+    if not_text:
+        return f"{', '.join(not_text)} must be text."
+
+    missing = [field for field in RESERVATION_FIELDS if not (fields.get(field) or "").strip()]
+    if missing:
+        return f"Missing {', '.join(missing)}."
+
+    error = booking_date_error(fields["reservation_date"])
+    if error:
+        return error
+
+    if fields["reservation_time"] not in RESERVATION_TIMES:
+        return "Please pick one of the listed times."
+
+    return None
+
+
+async def slot_full(fields):
+    # Turn away requests for a full time slot before touching the database
+    _, slots = await run_in_threadpool(cached_availability, fields["reservation_date"], fields["vehicle_type"])
+    return bool(slots) and any(slot["time"] == fields["reservation_time"] and slot["remaining"] <= 0 for slot in slots)
+
+
+# Clients trusted with /metrics and full reservation records when USA_PARKING_METRICS_TOKEN is unset
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+# Headers a reverse proxy adds; a request carrying one came from somewhere else, whatever its socket says
+FORWARDING_HEADERS = ("forwarded", "x-forwarded-for", "x-real-ip")
+
+
+def operator_request(request):
+    """Whether the request may see operator data: /metrics and full reservation records.
+
+    With USA_PARKING_METRICS_TOKEN set, that takes the token as a bearer
+    token; without it, a loopback client that did not come through a proxy.
+    """
+    token = get_context().getenv("USA_PARKING_METRICS_TOKEN")
+
+    if token:
+        return hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}")
+
+    if any(header in request.headers for header in FORWARDING_HEADERS):
+        return False
+
+    return request.client is not None and request.client.host in LOOPBACK_HOSTS
+
+
+def reservation_json(row, full=False):
+    """A reservation's status and schedule; with `full`, also the contact details of whoever made it."""
+    reservation = {"id": row[0], "reservation_date": row[7], "reservation_time": row[8], "status": row[9],
+                   "assigned_slot": row[10], "starts_at": row[13], "ends_at": row[15]}
+
+    if full:
+        reservation.update(name=row[1], owner_type=row[2], email=row[3], contact_number=row[4], plate_number=row[5], vehicle_type=row[6])
+
+    return reservation
+
+
 @app.get("/", response_class=HTMLResponse)
 def form(request: Request):
-    return templates.TemplateResponse("reservation_form.html", {"request": request})
+    etag, html, gzipped = render_form()
+    compressed = "gzip" in request.headers.get("accept-encoding", "")
+
+    # The gzip body is different bytes, so it gets its own strong ETag.
+    if compressed:
+        etag = etag[:-1] + '-gzip"'
+
+    # Revalidated every time so a new build's asset names are picked up, but a 304 costs nothing to send.
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if compressed:
+        return HTMLResponse(gzipped, headers={**headers, "Content-Encoding": "gzip"})
+
+    return HTMLResponse(html, headers=headers)
 
 @app.post("/submit", response_class=HTMLResponse)
-def submit(request: Request, name: str = Form(...), owner_type: str = Form(...), email: str = Form(...), contact_number: str = Form(...), plate_number: str = Form(...), vehicle_type: str = Form(...), reservation_date: str = Form(...), reservation_time: str = Form(...)):
+async def submit(request: Request, name: str = Form(...), owner_type: str = Form(...), email: str = Form(...), contact_number: str = Form(...), plate_number: str = Form(...), vehicle_type: str = Form(...), reservation_date: str = Form(...), reservation_time: str = Form(...), request_token: str = Form(None)):
+
+    fields = dict(name=name, owner_type=owner_type, email=email, contact_number=contact_number, plate_number=plate_number,
+                  vehicle_type=vehicle_type, reservation_date=reservation_date, reservation_time=reservation_time)
+
+    error = reservation_error(fields)
+    if error:
+        return form_page(400, error=error)
+
+    # A double click or a refresh after POST gets the first submission's answer
+    key = request_key(fields, request_token)
+    if await run_in_threadpool(earlier_reservation, key):
+        return form_page(message="Submitted successfully!")
+
+    if await slot_full(fields):
+        return form_page(error="That time slot is fully booked. Please pick another time.")
+
+    # After the capacity check, so a request turned away for a full slot does not spend the plate's token
+    wait = plate_wait(fields)
+    if wait:
+        response = form_page(429, error="This plate number has too many recent reservations. Please wait a minute and try again.")
+        response.headers["Retry-After"] = retry_after(wait)
+        return response
+
+    try:
+        created = await get_writer().wait(save_reservation(fields, key))
+    except WriterBusy:
+        return form_page(503, error="We are receiving too many reservations right now. Please try again in a moment.")
+    except asyncio.TimeoutError:
+        return form_page(503, error="Your reservation is taking longer than usual. Please check with the parking office before submitting again.")
+    except Exception as e:
+        print("Error Occurred!", e)
+        created = False
+
+    if created:
+        return form_page(message="Submitted successfully!")
+
+    return form_page(error="Failed to submit!")
+
+@app.post("/api/reservations")
+async def api_create_reservation(request: Request):
+    try:
+        fields = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+
+    if not isinstance(fields, dict):
+        return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+
+    error = reservation_error(fields)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+
+    key = request_key(fields, request.headers.get("idempotency-key") or fields.get("request_key"))
+    row = await run_in_threadpool(earlier_reservation, key)
+    if row:
+        return JSONResponse({"id": row[0], "status": row[9]}, status_code=201)
+
+    if await slot_full(fields):
+        return JSONResponse({"error": "time slot is fully booked"}, status_code=409)
+
+    wait = plate_wait(fields)
+    if wait:
+        return JSONResponse({"error": "too many reservations for this plate"}, status_code=429, headers={"Retry-After": retry_after(wait)})
+
+    try:
+        row = await get_writer().wait(save_reservation(fields, key))
+    except (WriterBusy, asyncio.TimeoutError):
+        return JSONResponse({"error": "busy, try again"}, status_code=503)
+    except Exception as e:
+        print("Error Occurred!", e)
+        row = None
+
+    if not row:
+        return JSONResponse({"error": "failed to save reservation"}, status_code=500)
+
+    return JSONResponse({"id": row[0], "status": row[9]}, status_code=201)
+
+@app.post("/api/reservations/bulk")
+async def api_bulk_reservations(request: Request):
+    """One reservation per line of NDJSON in, one result per line out, in the same order.
+
+    Lines are handed to the writer as they are read, so they are committed
+    in its batches while the rest of the body is still arriving, and each
+    result is sent as soon as its line is settled. Past MAX_BULK_ROWS lines,
+    or on a line longer than MAX_BULK_LINE_BYTES, the body is not read any
+    further; one last error line says so.
+    """
+    writer = get_writer()
+    # Operator imports (a week of bookings for one faculty car, say) are not held to the per-plate limit.
+    operator = operator_request(request)
+    # Results in line order: error dicts, or (line, future) for rows handed to the writer; None ends the response.
+    results = asyncio.Queue()
+    in_flight = deque()
+
+    async def submit_line(line, text):
+        try:
+            fields = json.loads(text)
+        except ValueError:
+            fields = None
+
+        if not isinstance(fields, dict):
+            return {"line": line, "error": "line must be a JSON object"}
+
+        error = reservation_error(fields)
+        if error:
+            return {"line": line, "error": error}
+
+        key = request_key(fields, fields.get("request_key"))
+        row = await run_in_threadpool(earlier_reservation, key)
+        if row:
+            return {"line": line, "id": row[0], "status": row[9]}
+
+        if await slot_full(fields):
+            return {"line": line, "error": "time slot is fully booked"}
+
+        if not operator and plate_wait(fields):
+            return {"line": line, "error": "too many reservations for this plate"}
+
+        # Keep at most a batch of this request's rows queued, leaving room for form submits.
+        while in_flight and (in_flight[0].done() or len(in_flight) >= writer.batch_rows):
+            await asyncio.wait([in_flight.popleft()])
+
+        while True:
+            try:
+                future = asyncio.wrap_future(save_reservation(fields, key))
+                in_flight.append(future)
+                return line, future
+            except WriterBusy:
+                # Wait for our own oldest row instead of failing; if none is queued, the queue is other callers'.
+                if not in_flight:
+                    return {"line": line, "error": "busy, try again"}
+                await asyncio.wait([in_flight.popleft()])
+
+    async def read():
+        buffer = b""
+        line = 0
+
+        async def take(texts):
+            """Queue a result per non-blank line; False once past the line limit."""
+            nonlocal line
+
+            for text in texts:
+                if text.strip():
+                    line += 1
+
+                    if line > MAX_BULK_ROWS:
+                        results.put_nowait({"line": line, "error": f"over the {MAX_BULK_ROWS} line limit; the rest was not read"})
+                        return False
+
+                    try:
+                        result = await submit_line(line, text)
+                    except Exception as e:
+                        # One bad line gets an error result; the lines after it still get theirs.
+                        print("Error Occurred!", e)
+                        result = {"line": line, "error": "could not process line"}
+
+                    results.put_nowait(result)
+
+            return True
+
+        try:
+            async for chunk in request.stream():
+                *lines, buffer = (buffer + chunk).split(b"\n")
+
+                if not await take(lines):
+                    return
+
+                if len(buffer) > MAX_BULK_LINE_BYTES:
+                    results.put_nowait({"line": line + 1, "error": f"line longer than {MAX_BULK_LINE_BYTES} bytes; the rest was not read"})
+                    return
+
+            await take([buffer])
+        except Exception as e:
+            print("Error Occurred!", e)
+        finally:
+            results.put_nowait(None)
+
+    reader = asyncio.create_task(read())
+
+    async def body():
+        try:
+            while True:
+                result = await results.get()
+
+                if result is None:
+                    return
+
+                if isinstance(result, tuple):
+                    line, future = result
+                    try:
+                        row = await future
+                    except Exception as e:
+                        print("Error Occurred!", e)
+                        row = None
+
+                    result = {"line": line, "id": row[0], "status": row[9]} if row else {"line": line, "error": "failed to save reservation"}
+
+                yield json.dumps(result) + "\n"
+        finally:
+            reader.cancel()
+
+    return BodyStreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/api/reservations/{reservation_id}")
+async def api_get_reservation(request: Request, reservation_id: int):
+    """A reservation's status and schedule, and its personal details for whoever may see them.
+
+    Ids are sequential, so name, contact details and plate only go to the
+    operator or to a caller sending the Idempotency-Key it was created with.
+    """
+    row = (await run_in_threadpool(get_reservations_by_id, [reservation_id])).get(reservation_id)
+
+    if row is None:
+        return JSONResponse({"error": "not found"}, status_code=404)
+
+    key = request.headers.get("idempotency-key")
+    owner = bool(key) and row[17] is not None and hmac.compare_digest(row[17], request_key(None, key))
+
+    return JSONResponse(reservation_json(row, full=owner or operator_request(request)))
+
+@app.get("/static/{filename}")
+def static_asset(request: Request, filename: str):
+    found = find_asset(filename, request.headers.get("accept-encoding", ""))
+
+    if found is None:
+        return Response(status_code=404)
+
+    path, encoding = found
+    headers = {"Cache-Control": ASSET_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return FileResponse(path, media_type=mimetypes.guess_type(filename)[0], headers=headers)
+
+@app.get("/availability")
+def availability(request: Request, date: str, vehicle_type: str = None):
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return JSONResponse({"error": "date must be YYYY-MM-DD"}, status_code=400)
+
+    error = booking_date_error(date)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+
+    etag, slots = cached_availability(date, vehicle_type)
+
+    if slots is None:
+        return JSONResponse({"error": "availability unavailable"}, status_code=503)
+
+    ttl = int(float(get_context().getenv("USA_PARKING_AVAILABILITY_TTL", DEFAULT_AVAILABILITY_TTL)))
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={ttl}"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse({"date": date, "slots": slots}, headers=headers)
+
+@app.get("/stream/slots")
+async def stream_slots(request: Request):
+    """Server-Sent Events: a "snapshot" of every slot, then a "delta" with just the slots that changed.
+
+    A client reconnecting with Last-Event-ID gets what it missed as one
+    delta, or a new snapshot if that is too far back.
+    """
+    stream = get_slot_stream()
+    last_seen = stream.parse_event_id(request.headers.get("last-event-id"))
+
+    async def events():
+        stream.subscribers += 1
+        try:
+            yield "retry: 3000\n\n"
+
+            while not stream.version:
+                await stream.wait(0, STREAM_KEEPALIVE)
+
+                if not stream.version:
+                    yield ": keep-alive\n\n"
+
+            delta = stream.since(last_seen) if last_seen is not None else None
+
+            if delta is None:
+                yield sse("snapshot", stream.event_id(), {"slots": stream.states})
+            elif delta:
+                yield sse("delta", stream.event_id(), {"slots": delta})
+
+            version = stream.version
+
+            while True:
+                await stream.wait(version, STREAM_KEEPALIVE)
+
+                if stream.version == version:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                delta = stream.since(version)
+                version = stream.version
+
+                if delta is None:
+                    yield sse("snapshot", stream.event_id(), {"slots": stream.states})
+                else:
+                    yield sse("delta", stream.event_id(), {"slots": delta})
+        finally:
+            stream.subscribers -= 1
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+def metrics(request: Request):
+    if not operator_request(request):
+        return Response(status_code=404)
+
+    snapshot = registry.snapshot()
+
+    if _writer is not None:
+        snapshot["writer"] = _writer.stats()
+
+    if _slot_stream is not None:
+        snapshot["slot_stream"] = {"subscribers": _slot_stream.subscribers, "version": _slot_stream.version}
 
-    if create_reservation(name, owner_type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time):
-        return templates.TemplateResponse("reservation_form.html", {"request": request, "message": "Submitted successfully!"})
+    if _limiters is not None:
+        snapshot["rate_limit"] = {name: limiter.stats() for name, limiter in _limiters.items()}
 
-    return templates.TemplateResponse("reservation_form.html", {"request": request, "message": "Failed to submit!"})
+    return JSONResponse(snapshot)
 
 if __name__ == "__main__":
     import uvicorn
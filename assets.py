@@ -0,0 +1,152 @@
+"""Fingerprinted, precompressed static files for the reservation site.
+
+Sources live in static/; build() writes each one to static/dist/ as
+name.<hash>.ext next to .gz (and .br when the brotli package is installed)
+copies, so they can be cached forever and served without compressing per
+request. static/tailwind.css holds only the Tailwind utilities the form
+uses and is committed, so serving the site needs neither the Tailwind CLI
+nor its CDN; regenerate it with --tailwind after changing the classes.
+
+Run from the project root to build ahead of time:  python assets.py [--tailwind]
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(PROJECT_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+TEMPLATES_DIR = os.path.join(PROJECT_DIR, "templates")
+
+SOURCES = {"tailwind": "tailwind.css", "css": "reservation_form.css", "js": "reservation_form.js"}
+TAILWIND_INPUT = "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
+
+# Precompressed variants, best first, as (Content-Encoding, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz")) if brotli else (("gzip", ".gz"),)
+
+_manifest = None
+_lock = threading.Lock()
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write_file(path, data):
+    """Write data to path by renaming a finished temporary file over it, so no reader sees it half written."""
+    # A dotfile, which find_asset never serves
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        # mkstemp makes the file private; give it the permissions open() would have.
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_asset(name, data):
+    """Write data as name.<hash>.ext plus its compressed copies; return the dist file name."""
+    stem, ext = os.path.splitext(name)
+    filename = f"{stem}.{fingerprint(data)}{ext}"
+    path = os.path.join(DIST_DIR, filename)
+
+    if not os.path.exists(path):
+        # mtime=0 so the same source always gives the same bytes
+        write_file(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+
+        if brotli:
+            write_file(path + ".br", brotli.compress(data, quality=11))
+
+        # The plain file last: its presence means the variants are there too.
+        write_file(path, data)
+
+    return filename
+
+
+def compile_tailwind():
+    """Regenerate static/tailwind.css from the classes the form uses; needs the Tailwind CLI on PATH."""
+    cli = shutil.which("tailwindcss")
+
+    if cli is None:
+        raise RuntimeError("tailwindcss is not on PATH; install the Tailwind CLI to regenerate static/tailwind.css")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "input.css")
+
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(TAILWIND_INPUT)
+
+        content = ",".join([os.path.join(TEMPLATES_DIR, "*.html"), os.path.join(STATIC_DIR, "*.js")])
+
+        subprocess.run([cli, "-i", source, "-o", os.path.join(STATIC_DIR, SOURCES["tailwind"]), "--content", content, "--minify"],
+                       check=True, capture_output=True, timeout=120)
+
+
+def build():
+    """Build every asset and return the manifest: {"tailwind": url, "css": url, "js": url}."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+
+    for key, name in SOURCES.items():
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            manifest[key] = "/static/" + write_asset(name, f.read())
+
+    write_file(os.path.join(DIST_DIR, "manifest.json"), json.dumps(manifest, indent=2).encode("utf-8"))
+
+    return manifest
+
+
+def get_manifest():
+    """The asset URLs for templates, building them the first time they are asked for."""
+    global _manifest
+
+    if _manifest is None:
+        with _lock:
+            if _manifest is None:
+                _manifest = build()
+
+    return _manifest
+
+
+def find_asset(filename, accept_encoding=""):
+    """(path, content encoding or None) of the best variant of a built file, or None."""
+    # Only names build() wrote: no directories, no dotfiles.
+    if os.path.basename(filename) != filename or filename.startswith(".") or filename == "manifest.json":
+        return None
+
+    path = os.path.join(DIST_DIR, filename)
+
+    if not os.path.isfile(path):
+        return None
+
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+
+    return path, None
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--tailwind" in sys.argv[1:]:
+        compile_tailwind()
+
+    print(json.dumps(build(), indent=2))
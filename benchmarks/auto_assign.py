@@ -0,0 +1,76 @@
+"""Time the auto-assign preview and approval for a day of pending requests.
+
+Run from the project root:  python -m benchmarks.auto_assign [--requests N] [--slots N]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from db import database
+from db.timeutil import now_epoch, start_of_day
+from logic.models import preview_auto_assign, apply_auto_assign
+
+VEHICLES = ("Sedan", "SUV", "Pickup", "Motorcycle")
+
+
+def write_layout(path, slots):
+    rows = max(1, slots // 10)
+    layout = {"levels": [{"level": 1, "zones": [
+        {"zone": "Cars", "prefix": "C", "rows": rows, "columns": "ABCDEFGH", "vehicle_class": "car"},
+        {"zone": "Bikes", "prefix": "M", "rows": rows, "columns": "A", "vehicle_class": "motorcycle"},
+        {"zone": "Flex", "prefix": "F", "rows": rows, "columns": "A", "vehicle_class": "any"},
+    ]}]}
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(layout, f)
+
+
+def seed(requests):
+    day = start_of_day(now_epoch() + 86400)
+    rows = []
+
+    for i in range(requests):
+        starts_at = day + 6 * 3600 + random.randrange(12) * 3600
+        rows.append((f"Bench {i}", "Student", f"bench{i}@usa.edu.ph", "09170000000", f"BEN {i:05d}",
+                     random.choice(VEHICLES), "01-15-2030", "08:00", starts_at, starts_at + random.choice((1, 2, 3)) * 3600))
+
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO reservations (name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time, starts_at, ends_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--slots", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        layout = os.path.join(tmp, "layout.json")
+        write_layout(layout, args.slots)
+
+        database.configure(os.path.join(tmp, "bench.db"))
+        database.init_db()
+        database.create_parking_slots(layout)
+        seed(args.requests)
+
+        start = time.perf_counter()
+        preview = preview_auto_assign()
+        planned = time.perf_counter() - start
+
+        start = time.perf_counter()
+        approved = apply_auto_assign(preview)
+        applied = time.perf_counter() - start
+
+        print(f"{args.requests} requests, {len(preview['assignments'])} assigned, {len(preview['unassigned'])} left pending")
+        print(f"preview {planned * 1000:.0f} ms, approve {applied * 1000:.0f} ms ({approved} rows)")
+
+        database.close_connection()
+
+
+if __name__ == "__main__":
+    main()
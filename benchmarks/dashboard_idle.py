@@ -0,0 +1,92 @@
+"""CPU cost of the dashboard's refresh path while the database is idle.
+
+Replays the queries HomePage.fetch_database makes, once unconditionally (the
+old behaviour) and once behind a ChangeTracker, against a lot with some
+approved reservations. Every --write-every refreshes another connection
+writes a reservation, so the tracked run also shows it still picks up changes.
+
+Run from the project root:  python -m benchmarks.dashboard_idle [--refreshes N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from db import database
+from db.changes import ChangeTracker
+from db.timeutil import now_epoch
+from logic.models import get_car_owners, get_vehicles, get_parking_slots, get_next_reservations
+
+HOME_TABLES = ("car_owners", "registered_cars", "parking_slots", "reservations", "accepted_reservations")
+
+
+def seed(reservations):
+    starts_at = now_epoch() + 7200
+
+    with database.transaction() as conn:
+        slots = [row[0] for row in conn.execute("SELECT slot_number FROM parking_slots")]
+
+        for i in range(reservations):
+            cursor = conn.execute("INSERT INTO reservations (name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time, starts_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (f"Bench {i}", "Student", f"bench{i}@usa.edu.ph", "09170000000", f"BEN {i:04d}", "Sedan", "01-15-2030", "08:00", starts_at + i * 3600))
+            conn.execute("UPDATE reservations SET status = 'APPROVED', assigned_slot = ? WHERE id = ?",
+                         (slots[i % len(slots)], cursor.lastrowid))
+
+
+def refresh():
+    get_car_owners()
+    get_vehicles()
+    get_parking_slots()
+    get_next_reservations()
+
+
+def run(tracked, refreshes, write_every, db_path):
+    tracker = ChangeTracker()
+    other = sqlite3.connect(db_path, timeout=5)
+    refreshed = 0
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+
+    for i in range(refreshes):
+        if write_every and i and i % write_every == 0:
+            other.execute("UPDATE parking_slots SET is_occupied = 1 - is_occupied WHERE slot_number = '1A'")
+            other.commit()
+
+        if tracked and not tracker.changed(*HOME_TABLES):
+            continue
+
+        refresh()
+        refreshed += 1
+
+    cpu = time.process_time() - start_cpu
+    elapsed = time.perf_counter() - start
+    other.close()
+
+    return {"cpu_us": cpu / refreshes * 1e6, "wall_us": elapsed / refreshes * 1e6, "refreshed": refreshed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=5000)
+    parser.add_argument("--reservations", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        database.configure(db_path)
+        database.init_db()
+        seed(args.reservations)
+
+        print(f"{'refresh path':<14} {'cpu us/call':>12} {'wall us/call':>13} {'refreshed':>10}")
+        for label, tracked in (("always", False), ("change-gated", True)):
+            result = run(tracked, args.refreshes, args.write_every, db_path)
+            print(f"{label:<14} {result['cpu_us']:>12.1f} {result['wall_us']:>13.1f} {result['refreshed']:>10}")
+
+        database.close_connection()
+
+
+if __name__ == "__main__":
+    main()
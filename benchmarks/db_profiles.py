@@ -0,0 +1,91 @@
+"""Read/write throughput of each database profile.
+
+Run from the project root:  python -m benchmarks.db_profiles [--writes N] [--reads N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from db import database
+
+
+def insert_reservation(i):
+    with database.transaction() as conn:
+        conn.execute("INSERT INTO reservations (name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (f"Bench {i}", "Student", f"bench{i}@usa.edu.ph", "09170000000", f"BEN {i % 10000:04d}", "Sedan", "01-15-2030", "08:00"))
+
+
+def poll_slots():
+    with database.connection() as conn:
+        conn.execute("SELECT * FROM parking_slots").fetchall()
+
+
+def run_profile(name, writes, reads):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure(os.path.join(tmp, "bench.db"), name)
+        database.init_db()
+
+        start = time.perf_counter()
+        for i in range(writes):
+            insert_reservation(i)
+        write_rate = writes / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            poll_slots()
+        read_rate = reads / (time.perf_counter() - start)
+
+        # A writer thread and a polling reader at the same time, like uvicorn next to the dashboard.
+        locked = 0
+        stop = threading.Event()
+
+        def writer():
+            for i in range(writes):
+                insert_reservation(writes + i)
+            stop.set()
+            database.close_connection()
+
+        thread = threading.Thread(target=writer)
+        start = time.perf_counter()
+        thread.start()
+        polls = 0
+        while not stop.is_set():
+            try:
+                poll_slots()
+                polls += 1
+            except sqlite3.OperationalError:
+                locked += 1
+        thread.join()
+        mixed_elapsed = time.perf_counter() - start
+
+        database.close_connection()
+
+    return {
+        "profile": name,
+        "writes_per_s": write_rate,
+        "reads_per_s": read_rate,
+        "mixed_writes_per_s": writes / mixed_elapsed,
+        "mixed_reads_per_s": polls / mixed_elapsed,
+        "locked_errors": locked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--profiles", nargs="*", default=list(database.PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10} {'mixed w/s':>10} {'mixed r/s':>10} {'locked':>7}")
+    for name in args.profiles:
+        result = run_profile(name, args.writes, args.reads)
+        print(f"{result['profile']:<10} {result['writes_per_s']:>10.0f} {result['reads_per_s']:>10.0f} "
+              f"{result['mixed_writes_per_s']:>10.0f} {result['mixed_reads_per_s']:>10.0f} {result['locked_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Cold-import cost of the data layer, and whether importing it touches the database.
+
+Run from the project root:  python -m benchmarks.import_time [--runs N] [--ref GIT_REF]
+
+--ref also measures an older commit (exported with git archive) for comparison.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import time
+start = time.perf_counter()
+import logic.models, logic.auth
+print(time.perf_counter() - start)
+"""
+
+
+def measure(project_dir, runs):
+    timings = []
+    touched = False
+
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home, USERPROFILE=home)
+            env.pop("USA_PARKING_DB_PATH", None)
+
+            result = subprocess.run([sys.executable, "-c", PROBE], cwd=project_dir, env=env,
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+            touched = touched or os.path.exists(os.path.join(home, "USAParkingManager"))
+
+    return statistics.median(timings) * 1000, touched
+
+
+def export_ref(ref, target):
+    archive = subprocess.run(["git", "archive", ref], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--ref", help="git ref to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    targets = [("working tree", os.getcwd())]
+    with tempfile.TemporaryDirectory() as old_tree:
+        if args.ref:
+            export_ref(args.ref, old_tree)
+            targets.insert(0, (args.ref, old_tree))
+
+        for label, project_dir in targets:
+            try:
+                median_ms, touched = measure(project_dir, args.runs)
+            except RuntimeError as e:
+                print(f"{label:<14} failed: {e}")
+                continue
+
+            print(f"{label:<14} median import {median_ms:7.1f} ms   opened database on import: {'yes' if touched else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
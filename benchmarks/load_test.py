@@ -0,0 +1,292 @@
+"""Enrollment-day load test for the reservation site.
+
+Starts api.py under uvicorn in a subprocess on a fresh database and ramps up
+--concurrency virtual users over --ramp seconds. Each user does what a
+student does: loads the form, checks a day's availability, thinks, submits
+(now and then double-clicking), and starts over until --duration is up.
+With --dashboard, this process also plays the admin's desktop app on the same
+database, polling reservations and running Auto-Assign every few seconds.
+
+Reports throughput, latency percentiles and status counts per request,
+the error rate, and how long writers waited for SQLite's write lock (the
+server's from /metrics, the dashboard's from this process). Results are
+saved as JSON; --compare prints them next to an earlier run.
+
+Run from the project root:  python -m benchmarks.load_test [--concurrency N] [--ramp S] [--duration S] [--dashboard] [--compare FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from db import database
+from db.instrumentation import percentile, registry
+from logic.models import get_next_reservations, get_reservations_page, preview_auto_assign, apply_auto_assign
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+
+TIMES = [f"{hour:02d}:00" for hour in range(6, 18)]
+VEHICLES = ("Sedan", "SUV", "Pickup", "Motorcycle")
+OWNER_TYPES = ("Student", "Faculty", "Staff", "Visitor")
+# Share of submits sent twice, like a double click
+DOUBLE_SUBMIT = 0.05
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env):
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port),
+                                "--log-level", "warning", "--no-access-log"], cwd=PROJECT_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    for _ in range(200):
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            httpx.get(base_url + "/metrics", timeout=1)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.05)
+
+    process.terminate()
+    raise RuntimeError("server did not start")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, name, elapsed, status):
+        self.latencies.setdefault(name, []).append(elapsed * 1000)
+        statuses = self.statuses.setdefault(name, {})
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def summary(self, duration):
+        endpoints = {}
+        total = errors = 0
+
+        for name, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            statuses = self.statuses[name]
+            failed = sum(count for status, count in statuses.items() if not isinstance(status, int) or status >= 400)
+            total += len(latencies)
+            errors += failed
+
+            endpoints[name] = {
+                "requests": len(latencies),
+                "rps": round(len(latencies) / duration, 2),
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p90_ms": round(percentile(latencies, 0.90), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "max_ms": round(latencies[-1], 2),
+                "error_rate": round(failed / len(latencies), 4),
+                "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            }
+
+        return {"requests": total, "rps": round(total / duration, 2), "error_rate": round(errors / total, 4) if total else 0.0,
+                "endpoints": endpoints}
+
+
+async def request(client, recorder, name, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        response, status = None, type(e).__name__
+    recorder.add(name, time.perf_counter() - start, status)
+    return response
+
+
+def submission(user, n):
+    day = date.today() + timedelta(days=random.randint(1, 14))
+    return {"name": f"Student {user}-{n}", "owner_type": random.choice(OWNER_TYPES), "email": f"student{user}.{n}@usa.edu.ph",
+            "contact_number": f"0917{random.randrange(10 ** 7):07d}", "plate_number": f"LT {user:04d}{n:03d}",
+            "vehicle_type": random.choice(VEHICLES), "reservation_date": day.isoformat(),
+            "reservation_time": random.choice(TIMES), "request_token": uuid.uuid4().hex}
+
+
+async def virtual_user(user, client, recorder, start_at, stop_at, think):
+    await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+    etag = None
+    n = 0
+
+    while time.monotonic() < stop_at:
+        page = await request(client, recorder, "GET /", "GET", "/", headers={"If-None-Match": etag} if etag else {})
+        if page is not None and page.status_code == 200:
+            etag = page.headers.get("etag")
+
+        form = submission(user, n)
+        await request(client, recorder, "GET /availability", "GET", "/availability",
+                      params={"date": form["reservation_date"], "vehicle_type": form["vehicle_type"]})
+
+        await asyncio.sleep(random.uniform(0, 2 * think))
+
+        for _ in range(2 if random.random() < DOUBLE_SUBMIT else 1):
+            await request(client, recorder, "POST /submit", "POST", "/submit", data=form)
+
+        n += 1
+
+
+async def run_users(base_url, concurrency, ramp, duration, think):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.monotonic()
+        stop_at = start + duration
+        await asyncio.gather(*(virtual_user(user, client, recorder, start + ramp * user / concurrency, stop_at, think)
+                               for user in range(concurrency)))
+        elapsed = time.monotonic() - start
+
+    return recorder.summary(elapsed)
+
+
+def dashboard(stop, interval):
+    """The admin app on the same database: poll like the home and reservations pages, auto-assign now and then."""
+    polls = assigned = 0
+    next_assign = time.monotonic() + interval
+
+    while not stop.is_set():
+        get_next_reservations()
+        get_reservations_page(None, 100)
+        polls += 1
+
+        if time.monotonic() >= next_assign:
+            preview = preview_auto_assign()
+            assigned += (apply_auto_assign(preview) or 0) if preview else 0
+            next_assign = time.monotonic() + interval
+
+        stop.wait(1.0)
+
+    database.close_connection()
+    return polls, assigned
+
+
+def lock_wait_summary(stats):
+    if not stats:
+        return None
+
+    return {key: stats[key] for key in ("calls", "errors", "avg_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+
+
+def compare(current, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+
+    print(f"\ncompared with {previous_path} ({previous['started_at']})")
+    print(f"{'':<26} {'before':>10} {'now':>10}")
+    print(f"{'req/s':<26} {previous['rps']:>10} {current['rps']:>10}")
+    print(f"{'error rate':<26} {previous['error_rate']:>10} {current['error_rate']:>10}")
+
+    for name, now in current["endpoints"].items():
+        before = previous["endpoints"].get(name)
+        if before:
+            print(f"{name + ' p99 ms':<26} {before['p99_ms']:>10} {now['p99_ms']:>10}")
+
+    for side in ("server", "dashboard"):
+        before, now = previous["lock_wait"].get(side), current["lock_wait"].get(side)
+        if before and now:
+            print(f"{side + ' lock p99 ms':<26} {before['p99_ms']:>10} {now['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200, help="virtual users at full load")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds to bring all users in")
+    parser.add_argument("--duration", type=float, default=30, help="seconds from the first user to the end")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds a user spends on the form")
+    parser.add_argument("--dashboard", action="store_true", help="also run the admin app's reads and auto-assign")
+    parser.add_argument("--assign-every", type=float, default=5, help="seconds between dashboard auto-assigns")
+    parser.add_argument("--profile", help="database profile for server and dashboard")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="leave the per-address limit on (every user shares 127.0.0.1)")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load_test-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    random.seed(1)
+    started_at = datetime.now().isoformat(timespec="seconds")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        database.configure(db_path, args.profile)
+        database.init_db()
+        database.close_connection()
+
+        env = dict(os.environ, HOME=tmp, USERPROFILE=tmp, USA_PARKING_DB_PATH=db_path, USA_PARKING_SLOW_QUERY_MS="60000")
+        if args.profile:
+            env["USA_PARKING_DB_PROFILE"] = args.profile
+        if not args.keep_rate_limits:
+            env["USA_PARKING_IP_LIMIT"] = "1000000/1000000"
+
+        port = free_port()
+        process, base_url = start_server(port, env)
+
+        stop = threading.Event()
+        dashboard_result = {}
+        admin = None
+        if args.dashboard:
+            admin = threading.Thread(target=lambda: dashboard_result.update(zip(("polls", "assigned"), dashboard(stop, args.assign_every))))
+            admin.start()
+
+        try:
+            results = asyncio.run(run_users(base_url, args.concurrency, args.ramp, args.duration, args.think))
+            server_metrics = httpx.get(base_url + "/metrics", timeout=30).json()
+        finally:
+            stop.set()
+            if admin:
+                admin.join()
+            process.terminate()
+            process.wait()
+
+    results = {
+        "started_at": started_at,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        **results,
+        "lock_wait": {"server": lock_wait_summary(server_metrics.get("lock_wait")),
+                      "dashboard": lock_wait_summary(registry.snapshot().get("lock_wait")) if args.dashboard else None},
+        "dashboard": dashboard_result or None,
+        "writer": server_metrics.get("writer"),
+        "write_batch": lock_wait_summary(server_metrics.get("write_batch")),
+        "rate_limit": server_metrics.get("rate_limit"),
+    }
+
+    print(f"{args.concurrency} users, {args.ramp:g} s ramp, {args.duration:g} s: {results['requests']} requests, "
+          f"{results['rps']} req/s, error rate {results['error_rate']:.2%}")
+    print(f"{'request':<20} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>9}  statuses")
+    for name, stats in results["endpoints"].items():
+        print(f"{name:<20} {stats['rps']:>8} {stats['p50_ms']:>8} {stats['p90_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>9}  {stats['statuses']}")
+    for side, stats in results["lock_wait"].items():
+        if stats:
+            print(f"{side} lock waits: {stats['calls']} transactions, p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms, "
+                  f"max {stats['max_ms']} ms, {stats['errors']} gave up")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_test-{started_at.replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"saved {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
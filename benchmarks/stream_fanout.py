@@ -0,0 +1,88 @@
+"""Cost of idle /stream/slots subscribers and how fast a change reaches all of them.
+
+Starts api.py under uvicorn in a subprocess, connects --subscribers SSE
+clients, measures the server's CPU while they sit idle, then parks a car
+from this process (as the desktop app would) and times until every
+subscriber has received the delta.
+
+Run from the project root:  python -m benchmarks.stream_fanout [--subscribers N] [--idle S]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+import psutil
+
+from benchmarks.load_test import free_port, start_server
+from db import database
+from logic.models import park_vehicle
+
+
+async def subscribe(client, connected, received):
+    async with client.stream("GET", "/stream/slots") as response:
+        async for line in response.aiter_lines():
+            if line == "event: snapshot":
+                connected.append(time.perf_counter())
+            elif line == "event: delta":
+                received.append(time.perf_counter())
+                return
+
+
+async def run(base_url, server, subscribers, idle):
+    connected, received = [], []
+    # One connection more than there are subscribers, for the /metrics request.
+    limits = httpx.Limits(max_connections=subscribers + 1, max_keepalive_connections=subscribers + 1)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        tasks = [asyncio.create_task(subscribe(client, connected, received)) for _ in range(subscribers)]
+
+        while len(connected) < subscribers:
+            await asyncio.sleep(0.1)
+
+        process = psutil.Process(server.pid)
+        before = process.cpu_times()
+        await asyncio.sleep(idle)
+        after = process.cpu_times()
+        cpu = (after.user + after.system - before.user - before.system) / idle
+
+        metrics = (await client.get("/metrics")).json().get("slot_stream")
+
+        written = time.perf_counter()
+        await asyncio.to_thread(park_vehicle, "1A", "Sedan", "Bench", "BEN 0001", "Student", "09170000000")
+        await asyncio.gather(*tasks)
+
+    received.sort()
+    return cpu, metrics, (received[0] - written) * 1000, (received[-1] - written) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--idle", type=float, default=10, help="seconds to watch the server with everyone idle")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stream.db")
+        database.configure(db_path)
+        database.init_db()
+
+        env = dict(os.environ, HOME=tmp, USERPROFILE=tmp, USA_PARKING_DB_PATH=db_path)
+        server, base_url = start_server(free_port(), env)
+
+        try:
+            cpu, metrics, first, last = asyncio.run(run(base_url, server, args.subscribers, args.idle))
+        finally:
+            server.terminate()
+            server.wait()
+            database.close_connection()
+
+    print(f"{args.subscribers} subscribers {metrics}")
+    print(f"server CPU while idle: {cpu:.1%} of a core")
+    print(f"park -> delta delivered: first {first:.0f} ms, last {last:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
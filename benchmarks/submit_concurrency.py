@@ -0,0 +1,138 @@
+"""Throughput and tail latency of POST /submit under concurrent clients.
+
+Starts the reservation site under uvicorn in a subprocess, with the previous
+synchronous handler mounted next to it at /submit-sync, and drives both with
+--clients concurrent httpx clients for each client count.
+
+Run from the project root:  python -m benchmarks.submit_concurrency [--clients 50 200 1000] [--requests N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from db.instrumentation import percentile
+
+TIMES = [f"{hour:02d}:00" for hour in range(6, 18)]
+
+
+def serve(port):
+    import uvicorn
+    from fastapi import Form, Request
+    import api
+    from db import database
+
+    database.init_db()
+
+    # The handler as it was before submits went through the writer thread.
+    @api.app.post("/submit-sync")
+    def submit_sync(request: Request, name: str = Form(...), owner_type: str = Form(...), email: str = Form(...), contact_number: str = Form(...), plate_number: str = Form(...), vehicle_type: str = Form(...), reservation_date: str = Form(...), reservation_time: str = Form(...)):
+        _, slots = api.cached_availability(reservation_date, vehicle_type)
+        if slots and any(slot["time"] == reservation_time and slot["remaining"] <= 0 for slot in slots):
+            return api.templates.TemplateResponse("reservation_form.html", {"request": request, "assets": api.get_manifest(), "error": "That time slot is fully booked. Please pick another time."})
+
+        if api.create_reservation(name, owner_type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time):
+            return api.templates.TemplateResponse("reservation_form.html", {"request": request, "assets": api.get_manifest(), "message": "Submitted successfully!"})
+
+        return api.templates.TemplateResponse("reservation_form.html", {"request": request, "assets": api.get_manifest(), "error": "Failed to submit!"})
+
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def form(i):
+    day = date.today() + timedelta(days=1 + i % 60)
+    return {"name": f"Bench {i}", "owner_type": "Student", "email": f"bench{i}@usa.edu.ph", "contact_number": "09170000000",
+            "plate_number": f"BEN {i:05d}", "vehicle_type": "Sedan", "reservation_date": day.isoformat(),
+            "reservation_time": random.choice(TIMES)}
+
+
+async def drive(base_url, path, clients, requests):
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, data=form(i))
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return requests / elapsed, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, statuses
+
+
+def wait_until_up(base_url, process):
+    for _ in range(200):
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            httpx.get(base_url + "/metrics", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.05)
+
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per handler and client count")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    random.seed(1)
+
+    print(f"{'handler':<8} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+
+    for clients in args.clients:
+        for label, path in (("sync", "/submit-sync"), ("async", "/submit")):
+            # A fresh database per run so both handlers write into the same amount of data.
+            with tempfile.TemporaryDirectory() as tmp:
+                port = free_port()
+                env = dict(os.environ, HOME=tmp, USERPROFILE=tmp, USA_PARKING_DB_PATH=os.path.join(tmp, "bench.db"),
+                           USA_PARKING_SLOW_QUERY_MS="60000", USA_PARKING_IP_LIMIT="1000000/1000000")
+                process = subprocess.Popen([sys.executable, "-m", "benchmarks.submit_concurrency", "--serve", str(port)], env=env)
+                base_url = f"http://127.0.0.1:{port}"
+
+                try:
+                    wait_until_up(base_url, process)
+                    rate, p50, p99, statuses = asyncio.run(drive(base_url, path, clients, args.requests))
+                finally:
+                    process.terminate()
+                    process.wait()
+
+            print(f"{label:<8} {clients:>7} {rate:>8.0f} {p50:>8.1f} {p99:>8.1f}  {dict(sorted(statuses.items(), key=str))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Reservation inserts per second, one transaction each versus group-committed.
+
+--clients threads each create reservations as fast as they can, first
+calling create_reservation directly (a transaction and fsync per insert,
+all of them contending for the write lock) and then through a
+DatabaseWriter for each --windows batch window.
+
+Run from the project root:  python -m benchmarks.write_batching [--writes N] [--clients N] [--profile NAME]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from db import database
+from db.writer import DatabaseWriter
+from logic.models import create_reservation
+
+DAY = (date.today() + timedelta(days=1)).isoformat()
+
+
+def reservation(i):
+    return (f"Bench {i}", "Student", f"bench{i}@usa.edu.ph", "09170000000", f"BEN {i:05d}", "Sedan", DAY, "08:00")
+
+
+def run_clients(clients, writes, write):
+    per_client = writes // clients
+
+    def client(offset):
+        for i in range(offset, offset + per_client):
+            write(i)
+        database.close_connection()
+
+    threads = [threading.Thread(target=client, args=(n * per_client,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return per_client * clients / (time.perf_counter() - start)
+
+
+def measure(profile, clients, writes, window_ms=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure(os.path.join(tmp, "bench.db"), profile)
+        database.init_db()
+
+        if window_ms is None:
+            rate = run_clients(clients, writes, lambda i: create_reservation(*reservation(i)))
+            batch = 1.0
+        else:
+            writer = DatabaseWriter(max_queue=writes, batch_window_ms=window_ms)
+            rate = run_clients(clients, writes, lambda i: writer.submit(create_reservation, *reservation(i)).result())
+            batch = writer.stats()["mean_batch"]
+            writer.shutdown()
+
+        database.close_connection()
+
+    return rate, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--profile", default="safe", help="database profile; batching matters most where commits fsync")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5])
+    args = parser.parse_args()
+
+    print(f"{args.writes} inserts from {args.clients} threads, profile {args.profile}")
+
+    rate, batch = measure(args.profile, args.clients, args.writes)
+    print(f"{'inline':<16} {rate:>8.0f} inserts/s  mean batch {batch:.1f}")
+
+    for window_ms in args.windows:
+        rate, batch = measure(args.profile, args.clients, args.writes, window_ms)
+        print(f"{f'writer {window_ms:g} ms':<16} {rate:>8.0f} inserts/s  mean batch {batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
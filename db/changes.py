@@ -0,0 +1,53 @@
+from db.database import get_context
+
+
+class ChangeTracker:
+    """Tells one reader which tables were written since it last asked.
+
+    While the database is idle a poll is a single PRAGMA: data_version moves
+    when another connection commits and the manager's commit counter when
+    this process does. Only then are the per-table counters in
+    table_revisions (kept by triggers) read and compared.
+    """
+
+    def __init__(self, manager=None):
+        self._manager = manager
+        self._marker = None
+        self._revisions = {}
+
+    def poll(self):
+        """Return the set of tables changed since the previous poll (every table on the first)."""
+        manager = self._manager or get_context().manager
+        conn = manager.get()
+
+        # data_version is counted per connection, so remember which one it came from.
+        marker = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0], manager.commits)
+
+        if marker == self._marker:
+            return set()
+
+        revisions = dict(conn.execute("SELECT table_name, revision FROM table_revisions").fetchall())
+        changed = {table for table, revision in revisions.items() if self._revisions.get(table) != revision}
+
+        self._marker = marker
+        self._revisions = revisions
+
+        return changed
+
+    def acknowledge(self, before, after):
+        """Treat a write that moved the revisions from `before` to `after` as seen.
+
+        For readers that patch their own state after writing: only succeeds if
+        this tracker had seen exactly `before`, so nobody else's write is skipped.
+        """
+        if self._marker is None or any(self._revisions.get(table) != revision for table, revision in before.items()):
+            return False
+
+        self._revisions.update(after)
+        return True
+
+    def changed(self, *tables):
+        return bool(self.poll() & set(tables))
+
+    def revision(self, table):
+        return self._revisions.get(table)
@@ -1,169 +1,415 @@
 import sqlite3
 import os
-from datetime import datetime, timezone, timedelta
+import json
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from db.instrumentation import registry, trace_sql
+from db.migrations import migrate
+from db.timeutil import now_epoch, start_of_day
 
-os.makedirs('./data', exist_ok=True)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Connection-level tuning, picked with USA_PARKING_DB_PROFILE. "safe" is SQLite's
+# stock behaviour; "balanced" lets the API and the dashboard read and write
+# concurrently through WAL without giving up durability of committed data.
+PROFILES = {
+    "safe": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "fast": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name=None):
+    name = name or DEFAULT_PROFILE
+
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile '{name}', expected one of {', '.join(PROFILES)}")
+
+    return name, PROFILES[name]
+
+
+def apply_profile(conn, profile):
+    # busy_timeout goes first so switching the journal mode waits out other writers.
+    for pragma, value in profile.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+class ConnectionManager:
+    """Hands out one sqlite3 connection per thread, opened on first use."""
+
+    def __init__(self, db_path=None, profile=None):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._db_path = db_path
+        self.profile_name, self.profile = get_profile(profile)
+        # Commits made through this manager; PRAGMA data_version only sees other connections'.
+        self.commits = 0
+
+    @property
+    def db_path(self):
+        if self._db_path is None:
+            with self._lock:
+                if self._db_path is None:
+                    app_data_dir = os.path.join(os.path.expanduser("~"), "USAParkingManager")
+                    os.makedirs(app_data_dir, exist_ok=True)
+
+                    self._db_path = os.path.join(app_data_dir, "database.db")
+
+        return self._db_path
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.profile["busy_timeout"] / 1000)
+            apply_profile(conn, self.profile)
+            conn.set_trace_callback(trace_sql)
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.on_commit = []
+
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.get()
+        depth = self._local.depth
+
+        # Only the outermost block owns the transaction; nested blocks join it.
+        if depth == 0 and not conn.in_transaction:
+            # Time spent waiting for SQLite's write lock, as "lock_wait" in the metrics registry.
+            start = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                registry.record("lock_wait", (time.perf_counter() - start) * 1000, failed=True)
+                raise
+            registry.record("lock_wait", (time.perf_counter() - start) * 1000)
+
+        self._local.depth = depth + 1
+        try:
+            yield conn
+
+            if depth == 0:
+                conn.commit()
+
+                with self._lock:
+                    self.commits += 1
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+                self._local.on_commit.clear()
+            raise
+        finally:
+            self._local.depth = depth
+
+        if depth == 0:
+            self._run_on_commit()
+
+    @contextmanager
+    def savepoint(self):
+        """All-or-nothing block inside the current transaction: an exception undoes
+        only what ran in the block (and its on_commit callbacks), then propagates."""
+        conn = self.get()
+        callbacks = len(self._local.on_commit)
+
+        conn.execute("SAVEPOINT item")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO item")
+            conn.execute("RELEASE item")
+            del self._local.on_commit[callbacks:]
+            raise
+
+        conn.execute("RELEASE item")
+
+    def on_commit(self, callback):
+        """Call `callback` once the current transaction commits, or now if there is none.
+        Dropped if the transaction rolls back."""
+        self.get()
+
+        if self._local.depth == 0:
+            callback()
+        else:
+            self._local.on_commit.append(callback)
+
+    def _run_on_commit(self):
+        callbacks, self._local.on_commit = self._local.on_commit, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print("Error Occurred!", e)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class AppContext:
+    """Settings and database handles for one process, all resolved on first use.
+
+    Importing the data layer does no I/O: .env is read the first time a
+    setting is asked for, and the database is opened the first time a
+    connection is.
+    """
+
+    def __init__(self, db_path=None, profile=None, env_file=None):
+        self._db_path = db_path
+        self._profile = profile
+        self._env_file = env_file or os.path.join(PROJECT_DIR, ".env")
+        self._env_loaded = False
+        self._manager = None
+        self._lock = threading.RLock()
+
+    def getenv(self, key, default=None):
+        if not self._env_loaded:
+            with self._lock:
+                if not self._env_loaded:
+                    from dotenv import load_dotenv
+
+                    load_dotenv(self._env_file)
+                    self._env_loaded = True
+
+        return os.getenv(key, default)
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    self._manager = ConnectionManager(self._db_path or self.getenv("USA_PARKING_DB_PATH"),
+                                                      self._profile or self.getenv("USA_PARKING_DB_PROFILE"))
+
+        return self._manager
+
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def get_context():
+    global _context
+
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = AppContext()
+
+    return _context
+
+
+def configure(db_path=None, profile=None, env_file=None):
+    global _context
+    _context = AppContext(db_path, profile, env_file)
+    return _context
 
-DB_PATH = os.path.join("data", "parking.db")
-print(DB_PATH)
 
 def get_connection():
-    app_data_dir = os.path.join(os.path.expanduser("~"), "USAParkingManager")
-    os.makedirs(app_data_dir, exist_ok=True)
+    return get_context().manager.get()
 
-    db_path = os.path.join(app_data_dir, "database.db")
-    return sqlite3.connect(db_path)
 
-def create_parking_slots():
-    connection = get_connection()
-    cursor = connection.cursor()
+@contextmanager
+def connection():
+    yield get_context().manager.get()
 
-    letters = ["A", "B", "C", "D", "E"]
 
-    cursor.execute('SELECT * FROM parking_slots')
-    parking_slots = cursor.fetchall()
+def transaction():
+    return get_context().manager.transaction()
 
-    if not parking_slots:
-        for i in range(1, 6):
-            for letter in letters:
-                slot = f"{i}{letter}"
-                cursor.execute("INSERT INTO parking_slots (slot_number) VALUES (?)", (slot,))
-                connection.commit()
 
-    connection.close()
+def savepoint():
+    return get_context().manager.savepoint()
 
-def clear_past_reservations():
-    connection = get_connection()
-    cursor = connection.cursor()
 
-    cursor.execute('SELECT * FROM reservations')
-    reservations = cursor.fetchall()
+def on_commit(callback):
+    get_context().manager.on_commit(callback)
 
-    for res in reservations:
-        reservation_date = datetime.strptime(res[7], "%m-%d-%Y")
 
-        if datetime.now().date() > reservation_date.date():
-            cursor.execute('DELETE FROM reservations WHERE id=?', (res[0],))
+def close_connection():
+    get_context().manager.close()
 
-    connection.commit()
-    connection.close()
 
-def init_db():
+LAYOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parking_layout.json")
+
+
+def load_layout(path=None):
+    """Expand a layout file into (slot_number, zone, level, vehicle_class) rows.
+
+    A zone lists its slots explicitly under "slots", or as a grid of "rows"
+    by "columns" named prefix + row + column (1A, 1B, ... for the default lot).
+    """
+    path = path or get_context().getenv("USA_PARKING_LAYOUT") or LAYOUT_PATH
+
+    with open(path, encoding="utf-8") as f:
+        layout = json.load(f)
+
+    slots = []
+    for level in layout["levels"]:
+        for zone in level["zones"]:
+            names = zone.get("slots") or [f"{zone.get('prefix', '')}{row}{column}"
+                                          for row in range(1, zone["rows"] + 1)
+                                          for column in zone["columns"]]
+
+            slots.extend((name, zone["zone"], level["level"], zone.get("vehicle_class", "any")) for name in names)
+
+    return slots
+
+
+def create_parking_slots(layout_path=None):
+    """Bring parking_slots in line with the layout file.
+
+    Unchanged layouts are detected from a stored hash and cost two lookups.
+    Otherwise new slots are inserted and changed ones updated in bulk; slots
+    dropped from the layout are deleted unless occupied or holding an
+    approved reservation.
+    """
+    slots = load_layout(layout_path)
+    digest = hashlib.sha256(json.dumps(slots).encode("utf-8")).hexdigest()
+
     conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS admins (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password_hash TEXT NOT NULL,
-        admin_name TEXT NOT NULL,
-        admin_email TEXT NOT NULL
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS admin_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        admin_id INTEGER NOT NULL,
-        action TEXT,
-        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY(admin_id) REFERENCES admins(id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS car_owners (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner_name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        type TEXT NOT NULL,
-        contact_number TEXT NOT NULL
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS registered_cars (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner_id INTEGER,
-        plate_number TEXT UNIQUE NOT NULL,
-        vehicle_type TEXT NOT NULL,
-        FOREIGN KEY (owner_id) REFERENCES car_owners(id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS parking_slots (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        slot_number TEXT UNIQUE NOT NULL,
-        is_occupied BOOLEAN DEFAULT 0,
-        vehicle_type TEXT,
-        owner_name TEXT,
-        plate_number TEXT,
-        type TEXT,
-        contact_number TEXT
-        )
-    ''')
-
-    cursor.execute('''
-                   CREATE TRIGGER IF NOT EXISTS clear_parking_slot_fields
-                       AFTER UPDATE OF is_occupied
-                       ON parking_slots
-                       FOR EACH ROW
-                       WHEN NEW.is_occupied = 0
-                   BEGIN
-                       UPDATE parking_slots
-                       SET owner_name     = NULL,
-                           plate_number   = NULL,
-                           vehicle_type   = NULL,
-                           type = NULL,
-                           contact_number = NULL
-                       WHERE id = NEW.id;
-                   END;
-                   ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reservations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        type TEXT NOT NULL,
-        email TEXT NOT NULL,
-        contact_number TEXT NOT NULL,
-        plate_number TEXT NOT NULL,
-        vehicle_type TEXT,
-        reservation_date TEXT,
-        reservation_time TEXT,
-        status TEXT NOT NULL DEFAULT 'PENDING',
-        assigned_slot TEXT,
-        is_late BOOLEAN DEFAULT 0,
-        grace_period_until TEXT
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS accepted_reservations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        slot_number TEXT NOT NULL,
-        reservation_id TEXT,
-        FOREIGN KEY (reservation_id) REFERENCES reservations(id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TRIGGER IF NOT EXISTS accept_reservations
-            AFTER UPDATE OF status
-            ON reservations
-            FOR EACH ROW
-            WHEN NEW.status = 'APPROVED'
-        BEGIN
-            INSERT INTO accepted_reservations (slot_number, reservation_id)
-            VALUES (NEW.assigned_slot, NEW.id);
-        END
-    ''')
-
-
-    conn.commit()
-    conn.close()
+    has_slots = conn.execute("SELECT EXISTS (SELECT 1 FROM parking_slots)").fetchone()[0]
+    stored = conn.execute("SELECT value FROM app_meta WHERE key = 'parking_layout'").fetchone()
+
+    if has_slots and stored and stored[0] == digest:
+        return None
+
+    with transaction() as conn:
+        existing = {row[0]: row[1:] for row in conn.execute(
+            "SELECT slot_number, zone, level, vehicle_class FROM parking_slots")}
+        wanted = {slot[0] for slot in slots}
+
+        added = [slot for slot in slots if slot[0] not in existing]
+        changed = [slot[1:] + slot[:1] for slot in slots
+                   if slot[0] in existing and existing[slot[0]] != slot[1:]]
+        removed = [slot_number for slot_number in existing if slot_number not in wanted]
+
+        conn.executemany("INSERT INTO parking_slots (slot_number, zone, level, vehicle_class) VALUES (?, ?, ?, ?)", added)
+        conn.executemany("UPDATE parking_slots SET zone = ?, level = ?, vehicle_class = ? WHERE slot_number = ?", changed)
+
+        kept = [slot_number for (slot_number,) in conn.execute('''
+            SELECT slot_number FROM parking_slots ps
+            WHERE is_occupied = 1
+            OR EXISTS (SELECT 1 FROM accepted_reservations ar WHERE ar.slot_number = ps.slot_number)
+        ''') if slot_number in removed]
+
+        conn.executemany("DELETE FROM parking_slots WHERE slot_number = ?",
+                         [(slot_number,) for slot_number in removed if slot_number not in kept])
+
+        # Keep the old hash while some removed slots are still in use, so the diff runs again next start.
+        if not kept:
+            conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES ('parking_layout', ?)", (digest,))
+
+    summary = {"added": len(added), "updated": len(changed), "removed": len(removed) - len(kept), "kept": kept}
+    print(f"Parking layout synced: {summary}")
+
+    return summary
+
+
+# Days a deleted reservation is remembered for incremental readers
+TOMBSTONE_DAYS = 7
+
+ARCHIVED_COLUMNS = ("id, name, type, email, contact_number, plate_number, vehicle_type, reservation_date, "
+                    "reservation_time, status, assigned_slot, is_late, grace_period_until, starts_at, grace_ends_at, ends_at")
+
+
+def clear_past_reservations(limit=None):
+    """Move reservations from before today into reservations_archive.
+
+    At most `limit` rows are moved per call (all of them when None), oldest
+    first, in one transaction. Returns the number of rows archived.
+    """
+    with transaction() as conn:
+        archived = conn.execute(f'''
+            DELETE FROM reservations
+            WHERE id IN (
+                SELECT id FROM reservations
+                WHERE starts_at < ?
+                ORDER BY starts_at
+                LIMIT ?
+            )
+            RETURNING {ARCHIVED_COLUMNS}
+        ''', (start_of_day(), -1 if limit is None else limit)).fetchall()
+
+        if archived:
+            archived_at = now_epoch()
+            conn.executemany(f"INSERT OR REPLACE INTO reservations_archive ({ARCHIVED_COLUMNS}, archived_at) "
+                             f"VALUES ({', '.join('?' * (len(archived[0]) + 1))})",
+                             [row + (archived_at,) for row in archived])
+            conn.executemany("DELETE FROM accepted_reservations WHERE reservation_id = ?",
+                             [(row[0],) for row in archived])
+
+        # Readers syncing from an older revision than the newest dropped tombstone have to reload.
+        pruned = conn.execute("DELETE FROM reservation_tombstones WHERE deleted_at < ? RETURNING revision",
+                              (now_epoch() - TOMBSTONE_DAYS * 24 * 3600,)).fetchall()
+
+        if pruned:
+            floor = conn.execute("SELECT value FROM app_meta WHERE key = 'reservation_tombstone_floor'").fetchone()
+            conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES ('reservation_tombstone_floor', ?)",
+                         (max([int(floor[0]) if floor else 0] + [row[0] for row in pruned]),))
+
+    return len(archived)
+
+
+def start_reservation_cleanup(interval=300, batch_size=500):
+    """Archive past reservations in the background, `batch_size` rows per run.
+
+    When a run uses up its whole budget the next one follows a second later;
+    otherwise the job sleeps for `interval` seconds. Set the returned event
+    to stop it.
+    """
+    stop = threading.Event()
+
+    def run():
+        delay = 0
+
+        while not stop.wait(delay):
+            try:
+                archived = clear_past_reservations(batch_size)
+                delay = 1 if archived == batch_size else interval
+            except sqlite3.Error as e:
+                print(f"Reservation cleanup error! {e}")
+                delay = interval
+
+        close_connection()
+
+    threading.Thread(target=run, name="reservation-cleanup", daemon=True).start()
+
+    return stop
+
+
+def init_db():
+    migrate(get_context().manager)
 
     create_parking_slots()
-    clear_past_reservations()
\ No newline at end of file
+    clear_past_reservations(limit=500)
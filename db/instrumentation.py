@@ -0,0 +1,185 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# Per-function call counts, latency percentiles, rows returned and the SQL each
+# data-layer function ran. Latencies keep a sliding window of recent calls.
+SAMPLE_SIZE = 1024
+MAX_SQL_PER_FUNCTION = 20
+# Statements kept per call; bulk writes trace one statement per row.
+MAX_STATEMENTS_PER_CALL = 1000
+DEFAULT_SLOW_QUERY_MS = 100
+
+# The trace callback sees statements with their parameters inlined; fold the
+# literals back into placeholders so one query shape is counted once.
+_literal = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_local = threading.local()
+
+
+def trace_sql(statement):
+    # Installed with sqlite3's set_trace_callback on every managed connection.
+    statements = getattr(_local, "statements", None)
+
+    if statements is not None and len(statements) < MAX_STATEMENTS_PER_CALL:
+        statements.append(statement)
+
+
+def normalize_sql(statement):
+    return _literal.sub("?", " ".join(statement.split()))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+        self.sql = {}
+
+    def add(self, elapsed_ms, rows, statements, failed):
+        self.calls += 1
+        self.errors += failed
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+
+        for statement in statements:
+            if statement in self.sql or len(self.sql) < MAX_SQL_PER_FUNCTION:
+                self.sql[statement] = self.sql.get(statement, 0) + 1
+
+    def to_dict(self):
+        samples = sorted(self.samples)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": round(percentile(samples, 0.50), 3),
+            "p95_ms": round(percentile(samples, 0.95), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "sql": self.sql,
+        }
+
+
+class MetricsRegistry:
+    """In-process store for query statistics that the GUI and the API can dump as JSON."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.slow_query_ms = None
+
+    def record(self, name, elapsed_ms, rows=0, statements=(), failed=False):
+        with self._lock:
+            stats = self._stats.get(name)
+
+            if stats is None:
+                stats = self._stats[name] = QueryStats()
+
+            stats.add(elapsed_ms, rows, statements, failed)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+    def dump_json(self, path=None, indent=2):
+        data = json.dumps(self.snapshot(), indent=indent)
+
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+registry = MetricsRegistry()
+
+
+def slow_query_threshold():
+    if registry.slow_query_ms is None:
+        from db.database import get_context
+
+        registry.slow_query_ms = float(get_context().getenv("USA_PARKING_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS))
+
+    return registry.slow_query_ms
+
+
+def count_rows(result):
+    if isinstance(result, (list, dict)):
+        return len(result)
+
+    if isinstance(result, tuple):
+        return 1
+
+    return 0
+
+
+def report_error(error):
+    """Print an error a data-layer function caught, and count it against the instrumented call it happened in.
+
+    Those functions return None, False or [] instead of raising, so without
+    this the wrapper would record every one of them as a success.
+    """
+    print("Error Occurred!", error)
+
+    if getattr(_local, "statements", None) is not None:
+        _local.failed = True
+
+
+def instrumented(func):
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_local, "statements", None)
+        outer_failed = getattr(_local, "failed", False)
+        statements = _local.statements = []
+        _local.failed = False
+        failed = False
+        start = time.perf_counter()
+
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException:
+            failed = True
+            result = None
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            failed = failed or _local.failed
+            _local.statements = outer
+            _local.failed = outer_failed
+
+            if outer is not None:
+                outer.extend(statements)
+
+            statements = [normalize_sql(statement) for statement in statements]
+            registry.record(name, elapsed_ms, count_rows(result), statements, failed)
+
+            if elapsed_ms >= slow_query_threshold():
+                # Each distinct statement once; a bulk write would otherwise print thousands.
+                print(f"Slow query! {name} took {elapsed_ms:.1f} ms: {' | '.join(dict.fromkeys(statements))}")
+
+    return wrapper
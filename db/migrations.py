@@ -0,0 +1,298 @@
+# Numbered schema migrations. The applied version lives in PRAGMA user_version,
+# so an up-to-date database skips every DDL statement on startup.
+#
+# Each migration is (version, description, steps); a step is either a SQL
+# statement or a callable taking the connection. Append new migrations at the
+# end and never edit one that has already shipped.
+
+MIGRATIONS = [
+    (1, "baseline schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS admins (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        admin_name TEXT NOT NULL,
+        admin_email TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS admin_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        admin_id INTEGER NOT NULL,
+        action TEXT,
+        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(admin_id) REFERENCES admins(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS car_owners (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        type TEXT NOT NULL,
+        contact_number TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS registered_cars (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id INTEGER,
+        plate_number TEXT UNIQUE NOT NULL,
+        vehicle_type TEXT NOT NULL,
+        FOREIGN KEY (owner_id) REFERENCES car_owners(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS parking_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slot_number TEXT UNIQUE NOT NULL,
+        is_occupied BOOLEAN DEFAULT 0,
+        vehicle_type TEXT,
+        owner_name TEXT,
+        plate_number TEXT,
+        type TEXT,
+        contact_number TEXT
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS clear_parking_slot_fields
+            AFTER UPDATE OF is_occupied
+            ON parking_slots
+            FOR EACH ROW
+            WHEN NEW.is_occupied = 0
+        BEGIN
+            UPDATE parking_slots
+            SET owner_name     = NULL,
+                plate_number   = NULL,
+                vehicle_type   = NULL,
+                type = NULL,
+                contact_number = NULL
+            WHERE id = NEW.id;
+        END
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reservations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        email TEXT NOT NULL,
+        contact_number TEXT NOT NULL,
+        plate_number TEXT NOT NULL,
+        vehicle_type TEXT,
+        reservation_date TEXT,
+        reservation_time TEXT,
+        status TEXT NOT NULL DEFAULT 'PENDING',
+        assigned_slot TEXT,
+        is_late BOOLEAN DEFAULT 0,
+        grace_period_until TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS accepted_reservations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slot_number TEXT NOT NULL,
+        reservation_id TEXT,
+        FOREIGN KEY (reservation_id) REFERENCES reservations(id)
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS accept_reservations
+            AFTER UPDATE OF status
+            ON reservations
+            FOR EACH ROW
+            WHEN NEW.status = 'APPROVED'
+        BEGIN
+            INSERT INTO accepted_reservations (slot_number, reservation_id)
+            VALUES (NEW.assigned_slot, NEW.id);
+        END
+        ''',
+    ]),
+    (2, "index accepted reservations by slot and reservation", [
+        "CREATE INDEX IF NOT EXISTS idx_accepted_reservations_slot_number ON accepted_reservations (slot_number)",
+        "CREATE INDEX IF NOT EXISTS idx_accepted_reservations_reservation_id ON accepted_reservations (reservation_id)",
+    ]),
+    (3, "index registered cars by owner", [
+        "CREATE INDEX IF NOT EXISTS idx_registered_cars_owner_id ON registered_cars (owner_id)",
+    ]),
+    (4, "index car owners by name", [
+        "CREATE INDEX IF NOT EXISTS idx_car_owners_owner_name ON car_owners (owner_name)",
+        "CREATE INDEX IF NOT EXISTS idx_car_owners_owner_name_nocase ON car_owners (owner_name COLLATE NOCASE)",
+    ]),
+    (5, "index reservations by status", [
+        "CREATE INDEX IF NOT EXISTS idx_reservations_status ON reservations (status)",
+    ]),
+    # MM-DD-YYYY text does not sort chronologically, so reservations get epoch
+    # columns (seconds, GMT+8 wall time) backfilled from the text ones.
+    (6, "store reservation start and grace period end as epoch seconds", [
+        "ALTER TABLE reservations ADD COLUMN starts_at INTEGER",
+        "ALTER TABLE reservations ADD COLUMN grace_ends_at INTEGER",
+        '''
+        UPDATE reservations
+        SET starts_at = CAST(strftime('%s', substr(reservation_date, 7, 4) || '-' || substr(reservation_date, 1, 2) || '-' ||
+                                            substr(reservation_date, 4, 2) || ' ' || reservation_time) AS INTEGER) - 28800
+        WHERE reservation_date IS NOT NULL AND reservation_time IS NOT NULL
+        ''',
+        '''
+        UPDATE reservations
+        SET grace_ends_at = CAST(strftime('%s', substr(grace_period_until, 7, 4) || '-' || substr(grace_period_until, 1, 2) || '-' ||
+                                                substr(grace_period_until, 4, 2) || ' ' || substr(grace_period_until, 12, 5)) AS INTEGER) - 28800
+        WHERE grace_period_until IS NOT NULL
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_reservations_slot_starts_at ON reservations (assigned_slot, starts_at)",
+        "CREATE INDEX IF NOT EXISTS idx_reservations_starts_at ON reservations (starts_at)",
+    ]),
+    (7, "archive table for past reservations", [
+        '''
+        CREATE TABLE IF NOT EXISTS reservations_archive (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        email TEXT NOT NULL,
+        contact_number TEXT NOT NULL,
+        plate_number TEXT NOT NULL,
+        vehicle_type TEXT,
+        reservation_date TEXT,
+        reservation_time TEXT,
+        status TEXT NOT NULL,
+        assigned_slot TEXT,
+        is_late BOOLEAN,
+        grace_period_until TEXT,
+        starts_at INTEGER,
+        grace_ends_at INTEGER,
+        archived_at INTEGER NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_reservations_archive_starts_at ON reservations_archive (starts_at)",
+    ]),
+    (8, "parking slot zones, levels and vehicle classes", [
+        "ALTER TABLE parking_slots ADD COLUMN zone TEXT",
+        "ALTER TABLE parking_slots ADD COLUMN level INTEGER",
+        "ALTER TABLE parking_slots ADD COLUMN vehicle_class TEXT",
+        '''
+        CREATE TABLE IF NOT EXISTS app_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+        )
+        ''',
+    ]),
+    (9, "per-table revision counters for change tracking", [
+        '''
+        CREATE TABLE IF NOT EXISTS table_revisions (
+        table_name TEXT PRIMARY KEY,
+        revision INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        lambda conn: create_revision_triggers(conn, ("admins", "car_owners", "registered_cars", "parking_slots",
+                                                     "reservations", "accepted_reservations")),
+    ]),
+    (10, "reservation end times", [
+        "ALTER TABLE reservations ADD COLUMN ends_at INTEGER",
+        "UPDATE reservations SET ends_at = starts_at + 3600 WHERE starts_at IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_reservations_slot_ends_at ON reservations (assigned_slot, ends_at, starts_at)",
+        "ALTER TABLE reservations_archive ADD COLUMN ends_at INTEGER",
+        "UPDATE reservations_archive SET ends_at = starts_at + 3600 WHERE starts_at IS NOT NULL",
+    ]),
+    (11, "index reservations by status in start order", [
+        "CREATE INDEX IF NOT EXISTS idx_reservations_status_starts_at ON reservations (status, starts_at)",
+    ]),
+    (12, "reservation row revisions and tombstones", [
+        "ALTER TABLE reservations ADD COLUMN revision INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_reservations_revision ON reservations (revision)",
+        '''
+        CREATE TABLE IF NOT EXISTS reservation_tombstones (
+        reservation_id INTEGER NOT NULL,
+        revision INTEGER NOT NULL,
+        deleted_at INTEGER NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_reservation_tombstones_revision ON reservation_tombstones (revision)",
+        "INSERT OR IGNORE INTO table_revisions (table_name) VALUES ('reservation_rows')",
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_insert_row_revision
+            AFTER INSERT ON reservations
+        BEGIN
+            UPDATE table_revisions SET revision = revision + 1 WHERE table_name = 'reservation_rows';
+            UPDATE reservations SET revision = (SELECT revision FROM table_revisions WHERE table_name = 'reservation_rows')
+            WHERE id = NEW.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_update_row_revision
+            AFTER UPDATE ON reservations
+            WHEN NEW.revision IS OLD.revision
+        BEGIN
+            UPDATE table_revisions SET revision = revision + 1 WHERE table_name = 'reservation_rows';
+            UPDATE reservations SET revision = (SELECT revision FROM table_revisions WHERE table_name = 'reservation_rows')
+            WHERE id = NEW.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_delete_row_revision
+            AFTER DELETE ON reservations
+        BEGIN
+            UPDATE table_revisions SET revision = revision + 1 WHERE table_name = 'reservation_rows';
+            INSERT INTO reservation_tombstones (reservation_id, revision, deleted_at)
+            VALUES (OLD.id, (SELECT revision FROM table_revisions WHERE table_name = 'reservation_rows'), CAST(strftime('%s', 'now') AS INTEGER));
+        END
+        ''',
+    ]),
+    (13, "idempotency keys for submitted reservations", [
+        "ALTER TABLE reservations ADD COLUMN request_key TEXT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_reservations_request_key ON reservations (request_key) WHERE request_key IS NOT NULL",
+    ]),
+    (14, "reservation page order with legacy rows that have no start", [
+        "CREATE INDEX IF NOT EXISTS idx_reservations_page ON reservations (COALESCE(starts_at, -1), id)",
+        "CREATE INDEX IF NOT EXISTS idx_reservations_status_page ON reservations (status, COALESCE(starts_at, -1), id)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def create_revision_triggers(conn, tables):
+    """Bump table_revisions.revision for `tables` on every insert, update and delete."""
+    for table in tables:
+        conn.execute("INSERT OR IGNORE INTO table_revisions (table_name) VALUES (?)", (table,))
+
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_revision
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_revisions SET revision = revision + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(manager):
+    """Apply every pending migration, one transaction each, and return the schema version."""
+    version = get_schema_version(manager.get())
+
+    if version >= LATEST_VERSION:
+        return version
+
+    for number, description, steps in MIGRATIONS:
+        if number <= version:
+            continue
+
+        with manager.transaction() as conn:
+            # Another process may have migrated while we waited for the write lock.
+            if get_schema_version(conn) >= number:
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(f"PRAGMA user_version = {number}")
+
+        print(f"Applied migration {number}: {description}")
+
+    return LATEST_VERSION
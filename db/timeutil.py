@@ -0,0 +1,24 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+# Reservations are made and kept in Philippine time (GMT+8). The database stores
+# instants as integer epoch seconds so they sort and range-scan correctly.
+ph_offset = timezone(timedelta(hours=8))
+
+
+def now_epoch():
+    return int(time.time())
+
+
+def to_epoch(date_str, time_str, date_format="%m-%d-%Y"):
+    moment = datetime.strptime(f"{date_str} {time_str}", f"{date_format} %H:%M")
+    return int(moment.replace(tzinfo=ph_offset).timestamp())
+
+
+def from_epoch(epoch):
+    return datetime.fromtimestamp(epoch, ph_offset)
+
+
+def start_of_day(epoch=None):
+    day = from_epoch(now_epoch() if epoch is None else epoch)
+    return int(day.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
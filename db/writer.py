@@ -0,0 +1,168 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from db.database import savepoint, transaction, close_connection
+from db.instrumentation import registry
+
+DEFAULT_WRITE_QUEUE = 256
+DEFAULT_WRITE_TIMEOUT = 10
+# How long the writer holds the first write of a batch open for more, and the most it takes in one.
+DEFAULT_BATCH_WINDOW_MS = 5
+DEFAULT_BATCH_ROWS = 100
+
+
+class WriterBusy(Exception):
+    """The write queue is full; the caller should shed the request."""
+
+
+class DatabaseWriter:
+    """Runs database writes for an asyncio app on one dedicated thread, group-committed.
+
+    Handlers await `run` instead of writing inline, so the event loop never
+    blocks on SQLite's lock or fsync. The writer thread takes the first
+    queued write, gathers whatever else arrives within `batch_window_ms`
+    (up to `batch_rows` writes) and runs them all in one transaction, each
+    inside its own savepoint: a write that raises is rolled back alone and
+    its caller gets the exception, the others still commit together. At
+    most `max_queue` writes wait at once; past that `run` raises WriterBusy
+    straight away rather than letting the backlog grow.
+    """
+
+    def __init__(self, max_queue=DEFAULT_WRITE_QUEUE, timeout=DEFAULT_WRITE_TIMEOUT,
+                 batch_window_ms=DEFAULT_BATCH_WINDOW_MS, batch_rows=DEFAULT_BATCH_ROWS):
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.batch_window_ms = batch_window_ms
+        self.batch_rows = max(1, batch_rows)
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.batches = 0
+        self.batched_writes = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                    self._thread.start()
+
+        return self._queue
+
+    def _done(self, _):
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, func, *args):
+        """Queue func(*args) and return a concurrent.futures.Future for its result."""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise WriterBusy(f"{self.pending} writes already queued")
+
+            self.pending += 1
+
+        future = Future()
+        future.add_done_callback(self._done)
+        self._started().put((func, args, future))
+
+        return future
+
+    async def run(self, func, *args):
+        """Run func(*args) on the writer thread and return its result.
+
+        Raises WriterBusy if the queue is full and asyncio.TimeoutError if the
+        result takes longer than `timeout` seconds. A timed-out write is not
+        withdrawn; it still runs when its turn comes.
+        """
+        return await self.wait(self.submit(func, *args))
+
+    async def wait(self, future):
+        """Await a future from `submit`, for at most `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def _loop(self):
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window_ms / 1000
+
+            while len(batch) < self.batch_rows:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+                if item is None:
+                    stopping = True
+                    break
+
+                batch.append(item)
+
+            self._commit(batch)
+
+        close_connection()
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        outcomes = []
+
+        try:
+            with transaction():
+                for func, args, future in batch:
+                    try:
+                        with savepoint():
+                            outcomes.append((future, func(*args), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The commit itself failed, so nothing in the batch was written.
+            print("Error Occurred!", e)
+            outcomes = [(future, None, e) for _, _, future in batch]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        registry.record("write_batch", elapsed_ms, rows=len(batch), failed=failed == len(batch))
+
+        with self._lock:
+            self.batches += 1
+            self.batched_writes += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self.pending, "max_queue": self.max_queue, "rejected": self.rejected, "timed_out": self.timed_out,
+                    "batch_window_ms": self.batch_window_ms, "batch_rows": self.batch_rows, "batches": self.batches,
+                    "mean_batch": round(self.batched_writes / self.batches, 2) if self.batches else 0.0,
+                    "largest_batch": self.largest_batch}
+
+    def shutdown(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
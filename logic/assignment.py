@@ -0,0 +1,65 @@
+import heapq
+
+# Slot vehicle_class (from the layout file) each reservation vehicle type needs;
+# anything not listed is a car. "any" slots take every vehicle.
+VEHICLE_CLASSES = {
+    "motorcycle": "motorcycle",
+}
+
+
+def vehicle_class(vehicle_type):
+    return VEHICLE_CLASSES.get((vehicle_type or "").strip().lower(), "car")
+
+
+def plan_assignments(pending, slots, slot_index):
+    """Assign pending reservations to slots as interval partitioning.
+
+    `pending` rows are (id, vehicle_type, starts_at, ends_at), `slots` rows
+    (slot_number, vehicle_class) and `slot_index` a SlotIntervalIndex of the
+    approvals already standing. Reservations are taken in start order; each
+    slot class keeps a heap of its slots keyed by when their last new
+    assignment ends, so a reservation goes to the earliest-freed compatible
+    slot, trying its own class before the "any" slots. Slots busy with an
+    existing approval at that time are passed over.
+
+    Returns ([(reservation_id, slot_number), ...], [unassigned reservation_id, ...]).
+    """
+    heaps = {}
+    for slot_number, slot_class in slots:
+        heaps.setdefault((slot_class or "any").lower(), []).append((0, slot_number))
+
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    assignments = []
+    unassigned = []
+
+    for reservation_id, vehicle_type, starts_at, ends_at in sorted(pending, key=lambda row: (row[2], row[0])):
+        slot_number = None
+
+        for slot_class in (vehicle_class(vehicle_type), "any"):
+            heap = heaps.get(slot_class)
+            passed = []
+
+            while heap and heap[0][0] <= starts_at:
+                free_at, candidate = heapq.heappop(heap)
+
+                if slot_index.is_free(candidate, starts_at, ends_at):
+                    heapq.heappush(heap, (ends_at, candidate))
+                    slot_number = candidate
+                    break
+
+                passed.append((free_at, candidate))
+
+            for entry in passed:
+                heapq.heappush(heap, entry)
+
+            if slot_number:
+                break
+
+        if slot_number:
+            assignments.append((reservation_id, slot_number))
+        else:
+            unassigned.append(reservation_id)
+
+    return assignments, unassigned
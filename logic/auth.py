@@ -1,26 +1,20 @@
 import bcrypt
-from db.database import get_connection
-import os
-from dotenv import load_dotenv
+from db.database import connection, transaction, get_context
 
-load_dotenv()
-master_key = os.getenv('SECRET_MASTER_KEY')
-
-conn = get_connection()
-cursor = conn.cursor()
+def get_master_key() -> str:
+    return get_context().getenv('SECRET_MASTER_KEY')
 
 def check_master_password(master_password: str) -> bool:
-    return bcrypt.checkpw(master_password.encode("utf-8"), master_key.encode("utf-8"))
+    return bcrypt.checkpw(master_password.encode("utf-8"), get_master_key().encode("utf-8"))
 
 def account_creation(username: str, password: str, admin_name: str, admin_email: str, master_password: str) -> bool:
     try:
         if check_master_password(master_password):
             hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-            cursor.execute("INSERT INTO admins (username, password_hash, admin_name, admin_email) VALUES (?, ?, ?, ?)",
-                           (username, hashed_password, admin_name, admin_email))
-
-            conn.commit()
+            with transaction() as conn:
+                conn.execute("INSERT INTO admins (username, password_hash, admin_name, admin_email) VALUES (?, ?, ?, ?)",
+                             (username, hashed_password, admin_name, admin_email))
 
             return True
     except Exception as error:
@@ -34,22 +28,23 @@ def account_edit(username: str, password: str, admin_name: str, admin_email: str
             if password:
                 hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-                cursor.execute('''UPDATE admins
-                                SET password_hash = ?,
-                                    admin_name = ?,
-                                    admin_email = ?
-                                WHERE username = ?
-                ''', (hashed_password, admin_name, admin_email, username))
+                with transaction() as conn:
+                    conn.execute('''UPDATE admins
+                                    SET password_hash = ?,
+                                        admin_name = ?,
+                                        admin_email = ?
+                                    WHERE username = ?
+                    ''', (hashed_password, admin_name, admin_email, username))
 
-                conn.commit()
                 return True
             else:
-                cursor.execute('''UPDATE admins
-                                SET admin_name = ?,
-                                    admin_email = ?
-                                WHERE username = ?
-                ''', (admin_name, admin_email, username))
-                conn.commit()
+                with transaction() as conn:
+                    conn.execute('''UPDATE admins
+                                    SET admin_name = ?,
+                                        admin_email = ?
+                                    WHERE username = ?
+                    ''', (admin_name, admin_email, username))
+
                 return True
 
         return False
@@ -61,8 +56,9 @@ def account_edit(username: str, password: str, admin_name: str, admin_email: str
 def account_deletion(username: str, master_password: str):
     try:
         if check_master_password(master_password):
-            cursor.execute("DELETE FROM admins WHERE username = ?", (username,))
-            conn.commit()
+            with transaction() as conn:
+                cursor = conn.execute("DELETE FROM admins WHERE username = ?", (username,))
+
             return cursor.rowcount == 1
     except Exception as error:
         print(f"Error occurred during account deletion: {error}")
@@ -71,8 +67,8 @@ def account_deletion(username: str, master_password: str):
 
 def get_admin_details(username):
     try:
-        cursor.execute('SELECT * FROM admins WHERE username = ?', (username,))
-        admin_details = cursor.fetchone()
+        with connection() as conn:
+            admin_details = conn.execute('SELECT * FROM admins WHERE username = ?', (username,)).fetchone()
 
         if admin_details:
             return admin_details
@@ -84,8 +80,8 @@ def get_admin_details(username):
 
 def get_all_admins():
     try:
-        cursor.execute("SELECT * FROM admins")
-        admins = cursor.fetchall()
+        with connection() as conn:
+            admins = conn.execute("SELECT * FROM admins").fetchall()
 
         if admins:
             return admins
@@ -97,11 +93,11 @@ def get_all_admins():
 
 def account_login(username: str, password: str) -> bool:
     try:
-        cursor.execute("SELECT password_hash FROM admins WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        with connection() as conn:
+            result = conn.execute("SELECT password_hash FROM admins WHERE username = ?", (username,)).fetchone()
 
         # If password input is the master_key, authenticate.
-        if bcrypt.checkpw(password.encode(), master_key.encode()):
+        if bcrypt.checkpw(password.encode(), get_master_key().encode()):
             return True
 
         # If no matched results, don't authenticate.
@@ -0,0 +1,140 @@
+import copy
+import threading
+from collections import OrderedDict
+import numpy as np
+from db.changes import ChangeTracker
+from db.timeutil import start_of_day
+from logic.assignment import vehicle_class
+
+BUCKET_SECONDS = 15 * 60
+BUCKETS_PER_DAY = 24 * 3600 // BUCKET_SECONDS
+# Day matrices kept at once; the least recently asked-for day is dropped first
+MAX_DAYS = 32
+
+
+class OccupancyMatrix:
+    """Approved reservations of one day as a slots x 15-minute-buckets array.
+
+    Cells count the reservations touching that bucket rather than just
+    flagging it, so releasing one reservation never frees a bucket another
+    one still shares. A bucket is free when its count is zero.
+    """
+
+    def __init__(self, day_start, slots, windows):
+        self.day_start = day_start
+        self.slot_numbers = [slot[0] for slot in slots]
+        self.rows = {slot_number: i for i, slot_number in enumerate(self.slot_numbers)}
+        self.classes = np.array([(slot[1] or "any").lower() for slot in slots], dtype=object)
+        self.occupied = np.array([bool(slot[2]) for slot in slots], dtype=bool)
+        self.reserved = np.zeros((len(slots), BUCKETS_PER_DAY), dtype=np.int16)
+
+        for slot_number, starts_at, ends_at in windows:
+            self.reserve(slot_number, starts_at, ends_at)
+
+    def copy(self):
+        """A matrix with its own reserved and occupied arrays; slot numbers and classes are shared."""
+        matrix = copy.copy(self)
+        matrix.reserved = self.reserved.copy()
+        matrix.occupied = self.occupied.copy()
+        return matrix
+
+    def buckets(self, starts_at, ends_at):
+        first = max(0, (starts_at - self.day_start) // BUCKET_SECONDS)
+        last = min(BUCKETS_PER_DAY, -(-(ends_at - self.day_start) // BUCKET_SECONDS))
+        return first, max(first, last)
+
+    def reserve(self, slot_number, starts_at, ends_at, count=1):
+        row = self.rows.get(slot_number)
+
+        if row is not None and starts_at is not None and ends_at is not None:
+            first, last = self.buckets(starts_at, ends_at)
+            self.reserved[row, first:last] += count
+
+    def release(self, slot_number, starts_at, ends_at):
+        self.reserve(slot_number, starts_at, ends_at, count=-1)
+
+    def set_occupied(self, slot_number, occupied):
+        row = self.rows.get(slot_number)
+
+        if row is not None:
+            self.occupied[row] = occupied
+
+    def compatible(self, vehicle_type=None):
+        if vehicle_type is None:
+            return np.ones(len(self.slot_numbers), dtype=bool)
+
+        return (self.classes == vehicle_class(vehicle_type)) | (self.classes == "any")
+
+    def free_mask(self, starts_at, ends_at, vehicle_type=None, now=None):
+        """Boolean per slot: no reservation in [starts_at, ends_at), fits the vehicle,
+        and not parked in when the window covers `now`."""
+        first, last = self.buckets(starts_at, ends_at)
+        mask = ~self.reserved[:, first:last].any(axis=1) & self.compatible(vehicle_type)
+
+        if now is not None and starts_at <= now < ends_at:
+            mask &= ~self.occupied
+
+        return mask
+
+    def capacity(self, span_seconds=3600, vehicle_type=None):
+        """Free compatible slots for each `span_seconds` window of the day, as an int array."""
+        span = span_seconds // BUCKET_SECONDS
+        windows = self.reserved.reshape(len(self.slot_numbers), -1, span).any(axis=2)
+        return (~windows & self.compatible(vehicle_type)[:, None]).sum(axis=0)
+
+
+class AvailabilityEngine:
+    """Occupancy matrices per day, built on demand and kept until the data changes.
+
+    Writes made in this process patch copies of the loaded matrices and
+    swap them in (see apply), so a caller still reading a matrix it was
+    handed never sees a half-applied write; a write from anywhere else
+    moves the table revisions and drops them all on the next query. At
+    most `max_days` days are kept.
+    """
+
+    def __init__(self, tables, load_slots, load_windows, max_days=MAX_DAYS):
+        self._tables = tables
+        self._load_slots = load_slots
+        self._load_windows = load_windows
+        self._max_days = max_days
+        self._tracker = ChangeTracker()
+        self._days = OrderedDict()
+        self._lock = threading.RLock()
+
+    def matrix(self, epoch):
+        day_start = start_of_day(epoch)
+
+        with self._lock:
+            if self._tracker.changed(*self._tables):
+                self._days.clear()
+
+            if day_start in self._days:
+                self._days.move_to_end(day_start)
+            else:
+                self._days[day_start] = OccupancyMatrix(day_start, self._load_slots(),
+                                                        self._load_windows(day_start, day_start + 24 * 3600))
+
+                while len(self._days) > self._max_days:
+                    self._days.popitem(last=False)
+
+            return self._days[day_start]
+
+    def apply(self, before, after, changes=()):
+        """Patch loaded matrices for a committed local write that moved the revisions from
+        `before` to `after`. If anything else was written in between, drop them instead."""
+        with self._lock:
+            if not self._tracker.acknowledge(before, after):
+                self._days.clear()
+                return
+
+            if not changes:
+                return
+
+            for day_start, matrix in list(self._days.items()):
+                patched = matrix.copy()
+
+                for change in changes:
+                    change(patched)
+
+                self._days[day_start] = patched
@@ -0,0 +1,78 @@
+from bisect import bisect_left
+
+
+class SlotIntervalIndex:
+    """Approved reservation windows per slot, sorted by start.
+
+    Next to the starts each slot keeps a running maximum of the ends, so
+    "is slot X free from t1 to t2" is one bisect: the slot is busy when any
+    window starting before t2 ends after t1. Windows are half-open, so a
+    reservation may start the second the previous one ends.
+    """
+
+    def __init__(self, rows=()):
+        self.load(rows)
+
+    def load(self, rows):
+        """Replace the contents with (slot_number, starts_at, ends_at, reservation_id) rows.
+
+        The new windows are built aside and swapped in with one assignment,
+        so a reader on another thread sees either the old index or the new
+        one, never a half-built one.
+        """
+        windows_by_slot = {}
+
+        for slot_number, starts_at, ends_at, reservation_id in rows:
+            if starts_at is not None and ends_at is not None:
+                windows_by_slot.setdefault(slot_number, []).append((starts_at, ends_at, reservation_id))
+
+        self._slots = {slot_number: self._build(sorted(windows)) for slot_number, windows in windows_by_slot.items()}
+
+    @staticmethod
+    def _build(windows):
+        max_ends = []
+        latest = None
+
+        for _, ends_at, _ in windows:
+            latest = ends_at if latest is None else max(latest, ends_at)
+            max_ends.append(latest)
+
+        return [window[0] for window in windows], windows, max_ends
+
+    def overlapping(self, slot_number, starts_at, ends_at):
+        """Reservation ids on the slot whose windows overlap [starts_at, ends_at)."""
+        # One read of _slots per call, so a reload swapped in meanwhile cannot mix two indexes.
+        entry = self._slots.get(slot_number)
+        return self._overlapping(entry, starts_at, ends_at) if entry else []
+
+    @staticmethod
+    def _overlapping(entry, starts_at, ends_at):
+        starts, windows, max_ends = entry
+        found = []
+
+        # Walk back from the last window starting before ends_at until nothing earlier can reach starts_at.
+        i = bisect_left(starts, ends_at) - 1
+        while i >= 0 and max_ends[i] > starts_at:
+            if windows[i][1] > starts_at:
+                found.append(windows[i][2])
+            i -= 1
+
+        return found
+
+    def is_free(self, slot_number, starts_at, ends_at, exclude=None):
+        entry = self._slots.get(slot_number)
+
+        if entry is None:
+            return True
+
+        starts, _, max_ends = entry
+        i = bisect_left(starts, ends_at)
+
+        if i == 0 or max_ends[i - 1] <= starts_at:
+            return True
+
+        # Something overlaps; only worth listing when one reservation may be ignored.
+        if exclude is None:
+            return False
+
+        return all(reservation_id == exclude for reservation_id in self._overlapping(entry, starts_at, ends_at))
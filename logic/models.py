@@ -1,301 +1,569 @@
-from db.database import get_connection
-from datetime import datetime, timezone, timedelta
+import threading
+from contextlib import contextmanager
+from db.database import connection, transaction, on_commit
+from db.changes import ChangeTracker
+from db.instrumentation import instrumented, report_error
+from db.timeutil import ph_offset, now_epoch, to_epoch, from_epoch
+from logic.intervals import SlotIntervalIndex
+from logic.assignment import plan_assignments, vehicle_class
+from logic.scheduler import COUNTDOWN_WINDOW
+from datetime import datetime
+
+# How long a reservation holds its slot unless a duration is given
+DEFAULT_DURATION_MINUTES = 60
+
+# Start times offered by the reservation form
+RESERVATION_TIMES = [f"{hour:02d}:00" for hour in range(6, 18)]
+
+# Tables that decide which slot is free when; any write to them makes an auto-assign preview stale
+SLOT_TABLES = ("parking_slots", "reservations", "accepted_reservations")
+
+_availability = None
+_availability_lock = threading.Lock()
+
+def get_table_revisions(conn, tables):
+    placeholders = ", ".join("?" * len(tables))
+    return dict(conn.execute(f"SELECT table_name, revision FROM table_revisions WHERE table_name IN ({placeholders})",
+                             tables).fetchall())
+
+def _availability_slots():
+    with connection() as conn:
+        return conn.execute("SELECT slot_number, vehicle_class, is_occupied FROM parking_slots ORDER BY slot_number").fetchall()
+
+def _availability_windows(day_start, day_end):
+    with connection() as conn:
+        return conn.execute('''
+            SELECT r.assigned_slot, r.starts_at, r.ends_at FROM reservations r
+            WHERE r.starts_at < ? AND r.ends_at > ?
+            AND EXISTS (
+                SELECT 1 FROM accepted_reservations ar
+                WHERE ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+            )
+        ''', (day_end, day_start)).fetchall()
+
+# Occupancy matrices behind the availability queries; NumPy is only imported on first use
+def get_availability():
+    global _availability
+
+    if _availability is None:
+        with _availability_lock:
+            if _availability is None:
+                from logic.availability import AvailabilityEngine
+
+                _availability = AvailabilityEngine(SLOT_TABLES, _availability_slots, _availability_windows)
 
-ph_offset = timezone(timedelta(hours=8))
-ph_time = datetime.now(ph_offset)
+    return _availability
 
-conn = get_connection()
-cursor = conn.cursor()
+# Write transaction yielding (conn, changes). Callables appended to changes patch the loaded
+# occupancy matrices once the write commits, instead of having them rebuilt.
+@contextmanager
+def slot_write():
+    changes = []
 
+    with transaction() as conn:
+        before = get_table_revisions(conn, SLOT_TABLES)
+        yield conn, changes
+        after = get_table_revisions(conn, SLOT_TABLES)
+
+        # Inside a batch the outer transaction may still roll back; patch only once it is durable.
+        if _availability is not None:
+            on_commit(lambda: _availability.apply(before, after, changes))
+
+@instrumented
 def new_admin_log(admin_name, action):
     try:
-        cursor.execute("SELECT id FROM admins WHERE username = ?", (admin_name,))
-        admin_id = cursor.fetchone()
+        with transaction() as conn:
+            admin_id = conn.execute("SELECT id FROM admins WHERE username = ?", (admin_name,)).fetchone()
 
-        cursor.execute("INSERT INTO admin_logs (admin_id, action, timestamp) VALUES (?, ?, ?)", (admin_id[0], action, ph_time))
-        conn.commit()
+            conn.execute("INSERT INTO admin_logs (admin_id, action, timestamp) VALUES (?, ?, ?)", (admin_id[0], action, datetime.now(ph_offset)))
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
 
-def create_reservation(name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time):
+# Returns the new reservation's id, or False if it could not be saved. A request_key
+# already used by another reservation returns that reservation's id and writes nothing.
+@instrumented
+def create_reservation(name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time,
+                       duration_minutes=DEFAULT_DURATION_MINUTES, request_key=None):
     try:
-        api_conn = get_connection()
-        api_cursor = api_conn.cursor()
-
-        reservation_date = datetime.strptime(reservation_date, "%Y-%m-%d")
-        reservation_time = datetime.strptime(reservation_time, "%H:%M")
+        starts_at = to_epoch(reservation_date, reservation_time, "%Y-%m-%d")
+        ends_at = starts_at + duration_minutes * 60
+        start = from_epoch(starts_at)
 
-        api_cursor.execute("INSERT INTO reservations (name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                       (name, type, email, contact_number, plate_number, vehicle_type, reservation_date.strftime("%m-%d-%Y"), reservation_time.strftime("%H:%M")))
+        with slot_write() as (conn, changes):
+            cursor = conn.execute("INSERT INTO reservations (name, type, email, contact_number, plate_number, vehicle_type, reservation_date, reservation_time, starts_at, ends_at, request_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                                  "ON CONFLICT (request_key) WHERE request_key IS NOT NULL DO NOTHING",
+                                  (name, type, email, contact_number, plate_number, vehicle_type, start.strftime("%m-%d-%Y"), start.strftime("%H:%M"), starts_at, ends_at, request_key))
 
-        api_conn.commit()
+            if cursor.rowcount == 0:
+                return conn.execute("SELECT id FROM reservations WHERE request_key = ?", (request_key,)).fetchone()[0]
 
-        return True
+        return cursor.lastrowid
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
         return False
 
 # Add New Car Owner
+@instrumented
 def new_car_owner(owner_name, email, owner_type, contact_number, refresh_callback=None) -> bool:
     try:
-        cursor.execute("INSERT INTO car_owners (owner_name, email, type, contact_number) VALUES (?, ?, ?, ?)",
-                       (owner_name, email, owner_type, contact_number))
-
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("INSERT INTO car_owners (owner_name, email, type, contact_number) VALUES (?, ?, ?, ?)",
+                         (owner_name, email, owner_type, contact_number))
 
         if refresh_callback:
             refresh_callback()
 
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
 
     return False
 
 
 # Park Vehicle to a Parking Slot
+@instrumented
 def park_vehicle(slot_number, vehicle_type, owner_name, plate_number, status_type, contact_number) -> bool:
     try:
-        cursor.execute('''
-                       UPDATE parking_slots
-                       SET is_occupied    = 1,
-                           vehicle_type   = ?,
-                           owner_name     = ?,
-                           plate_number   = ?,
-                           type           = ?,
-                           contact_number = ?
-                       WHERE slot_number = ?
-                       ''', (vehicle_type, owner_name, plate_number, status_type, contact_number, slot_number))
-
-        conn.commit()
+        with slot_write() as (conn, changes):
+            conn.execute('''
+                         UPDATE parking_slots
+                         SET is_occupied    = 1,
+                             vehicle_type   = ?,
+                             owner_name     = ?,
+                             plate_number   = ?,
+                             type           = ?,
+                             contact_number = ?
+                         WHERE slot_number = ?
+                         ''', (vehicle_type, owner_name, plate_number, status_type, contact_number, slot_number))
+            changes.append(lambda matrix: matrix.set_occupied(slot_number, True))
 
         # new_admin_log(admin_name, f"Parked {plate_number} in Slot {slot_number}")
 
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
 
+@instrumented
 def unpark_vehicle(slot) -> bool:
     try:
-        cursor.execute("SELECT is_occupied FROM parking_slots WHERE slot_number = ?", (slot,))
-        slot_occupied = cursor.fetchone()[0]
+        with slot_write() as (conn, changes):
+            slot_occupied = conn.execute("SELECT is_occupied FROM parking_slots WHERE slot_number = ?", (slot,)).fetchone()[0]
 
-        if slot_occupied == 1:
-            cursor.execute('''
-                           UPDATE parking_slots
-                           SET is_occupied = 0
-                           WHERE slot_number = ?
-                           ''', (slot,))
+            if slot_occupied == 1:
+                conn.execute('''
+                             UPDATE parking_slots
+                             SET is_occupied = 0
+                             WHERE slot_number = ?
+                             ''', (slot,))
+                changes.append(lambda matrix: matrix.set_occupied(slot, False))
 
-            conn.commit()
-
-            return True
+                return True
 
         return False
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
 
 # Assign Vehicle to Car Owner
+@instrumented
 def assign_vehicle(owner_name, plate_number, vehicle_type) -> bool:
     try:
-        cursor.execute("SELECT id FROM car_owners WHERE owner_name= ?", (owner_name,))
-        owner_id = cursor.fetchone()
-
-        if owner_id:
-            cursor.execute("INSERT INTO registered_cars (owner_id, plate_number, vehicle_type) VALUES (?, ?, ?)",
-                           (owner_id[0], plate_number, vehicle_type,))
+        with transaction() as conn:
+            owner_id = conn.execute("SELECT id FROM car_owners WHERE owner_name= ?", (owner_name,)).fetchone()
 
-            conn.commit()
+            if owner_id:
+                conn.execute("INSERT INTO registered_cars (owner_id, plate_number, vehicle_type) VALUES (?, ?, ?)",
+                             (owner_id[0], plate_number, vehicle_type,))
 
-            return True
+                return True
 
         return False
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
+# First approved reservation holding the slot somewhere in [starts_at, ends_at), if any
+def find_slot_conflict(conn, slot_number, starts_at, ends_at, exclude_id=None):
+    return conn.execute('''
+        SELECT r.id FROM reservations r
+        WHERE r.assigned_slot = ?
+        AND r.ends_at > ? AND r.starts_at < ?
+        AND r.id IS NOT ?
+        AND EXISTS (
+            SELECT 1 FROM accepted_reservations ar
+            WHERE ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+        )
+        LIMIT 1
+    ''', (slot_number, starts_at, ends_at, exclude_id)).fetchone()
+
+# True once approved, False if another approved reservation holds the slot at that time,
+# None if the reservation is gone or the write failed.
+@instrumented
 def accept_reservation(reservation_id, slot_number):
     try:
-        cursor.execute('''UPDATE reservations
-                        SET status = ?,
-                            assigned_slot = ?
-                        WHERE id = ?
-        ''', ("APPROVED", slot_number, reservation_id))
-        conn.commit()
+        with slot_write() as (conn, changes):
+            window = conn.execute("SELECT starts_at, ends_at FROM reservations WHERE id = ?", (reservation_id,)).fetchone()
+
+            if window is None:
+                return None
+
+            # Checked inside the write transaction, so two approvals cannot both take the slot.
+            conflict = find_slot_conflict(conn, slot_number, window[0], window[1], int(reservation_id))
+
+            if conflict:
+                print(f"Slot {slot_number} is already held by reservation {conflict[0]} at that time")
+                return False
+
+            conn.execute('''UPDATE reservations
+                            SET status = ?,
+                                assigned_slot = ?
+                            WHERE id = ?
+            ''', ("APPROVED", slot_number, reservation_id))
+            changes.append(lambda matrix: matrix.reserve(slot_number, *window))
 
         return True
     except Exception as e:
-        print("Error Occurred!", e)
-        return False
+        report_error(e)
+        return None
+
+@instrumented
+def preview_auto_assign():
+    try:
+        with connection() as conn:
+            # Read the revisions first: a write landing after this point makes the preview stale rather than wrong.
+            revisions = get_table_revisions(conn, SLOT_TABLES)
+            pending = conn.execute('''SELECT id, vehicle_type, starts_at, ends_at FROM reservations
+                                      WHERE status = 'PENDING' AND ends_at > ?''', (now_epoch(),)).fetchall()
+            slots = conn.execute("SELECT slot_number, vehicle_class FROM parking_slots").fetchall()
+
+        assignments, unassigned = plan_assignments(pending, slots, get_slot_index())
+
+        windows = {row[0]: row[2:] for row in pending}
+
+        return {"assignments": assignments, "unassigned": unassigned, "revisions": revisions, "windows": windows}
+    except Exception as e:
+        report_error(e)
+        return None
+
+# Approve a preview in one transaction; None when reservations or slots changed since it was made
+@instrumented
+def apply_auto_assign(preview):
+    try:
+        with slot_write() as (conn, changes):
+            if get_table_revisions(conn, SLOT_TABLES) != preview["revisions"]:
+                return None
+
+            conn.executemany('''UPDATE reservations
+                                SET status = 'APPROVED',
+                                    assigned_slot = ?
+                                WHERE id = ? AND status = 'PENDING'
+            ''', [(slot_number, reservation_id) for reservation_id, slot_number in preview["assignments"]])
 
+            for reservation_id, slot_number in preview["assignments"]:
+                changes.append(lambda matrix, slot_number=slot_number, window=preview["windows"][reservation_id]:
+                               matrix.reserve(slot_number, *window))
+
+        return len(preview["assignments"])
+    except Exception as e:
+        report_error(e)
+        return None
+
+@instrumented
 def reject_reservation(reservation_id):
     try:
-        cursor.execute('''UPDATE reservations
-                        SET status = ?
-                        WHERE id = ?
-        ''', ("REJECTED", reservation_id))
-        conn.commit()
+        with slot_write() as (conn, changes):
+            # A rejected request no longer answers for its idempotency key, so it can be sent again.
+            conn.execute('''UPDATE reservations
+                            SET status = ?,
+                                request_key = NULL
+                            WHERE id = ?
+            ''', ("REJECTED", reservation_id))
 
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
+# Slot and window the reservation holds, as the occupancy matrices count it
+def held_windows(conn, reservation_id):
+    return conn.execute('''
+        SELECT r.assigned_slot, r.starts_at, r.ends_at FROM reservations r
+        JOIN accepted_reservations ar ON ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+        WHERE r.id = ?
+    ''', (reservation_id,)).fetchall()
+
+@instrumented
 def cancel_accepted_reservation(reservation_id):
     try:
-        cursor.execute('DELETE FROM accepted_reservations WHERE reservation_id = ?', (reservation_id,))
-        conn.commit()
+        with slot_write() as (conn, changes):
+            for slot_number, starts_at, ends_at in held_windows(conn, reservation_id):
+                changes.append(lambda matrix, slot_number=slot_number, window=(starts_at, ends_at):
+                               matrix.release(slot_number, *window))
+
+            conn.execute('DELETE FROM accepted_reservations WHERE reservation_id = ?', (reservation_id,))
 
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
 
-def update_reservation_late_status(reservation_id, grace_period_str):
+@instrumented
+def update_reservation_late_status(reservation_id, grace_ends_at):
     try:
-        cursor.execute('''UPDATE reservations
-                        SET is_late = ?,
-                            grace_period_until = ?
-                        WHERE id = ?
-        ''', (1, grace_period_str, reservation_id))
+        grace_period_str = from_epoch(grace_ends_at).strftime("%m-%d-%Y %H:%M")
+
+        with slot_write() as (conn, changes):
+            cursor = conn.execute('''UPDATE reservations
+                                    SET is_late = ?,
+                                        grace_period_until = ?,
+                                        grace_ends_at = ?
+                                    WHERE id = ?
+            ''', (1, grace_period_str, grace_ends_at, reservation_id))
 
-        if cursor.rowcount == 0:
-            return False
+            if cursor.rowcount == 0:
+                return False
 
-        conn.commit()
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
 # ================== DELETION =================== #
 
+@instrumented
 def delete_reservation(reservation_id):
     try:
-        cursor.execute('DELETE FROM reservations WHERE id = ?', (reservation_id,))
+        with slot_write() as (conn, changes):
+            for slot_number, starts_at, ends_at in held_windows(conn, reservation_id):
+                changes.append(lambda matrix, slot_number=slot_number, window=(starts_at, ends_at):
+                               matrix.release(slot_number, *window))
 
-        if cursor.rowcount == 0:
-            return False
+            cursor = conn.execute('DELETE FROM reservations WHERE id = ?', (reservation_id,))
+
+            if cursor.rowcount == 0:
+                return False
 
-        conn.commit()
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
+@instrumented
 def delete_car_owner(owner_name) -> bool:
     try:
-        cursor.execute('SELECT id FROM car_owners WHERE owner_name = ?', (owner_name,))
-        owner_id = cursor.fetchone()
+        with transaction() as conn:
+            owner_id = conn.execute('SELECT id FROM car_owners WHERE owner_name = ?', (owner_name,)).fetchone()
 
-        if owner_id:
-            cursor.execute('DELETE FROM car_owners WHERE id = ?', (owner_id[0],))
-            conn.commit()
-            return True
+            if owner_id:
+                conn.execute('DELETE FROM car_owners WHERE id = ?', (owner_id[0],))
+                return True
 
         return False
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
+@instrumented
 def unassign_vehicle(plate_number) -> bool:
     try:
-        cursor.execute('''DELETE FROM registered_cars WHERE plate_number = ?''', (plate_number,))
+        with transaction() as conn:
+            cursor = conn.execute('''DELETE FROM registered_cars WHERE plate_number = ?''', (plate_number,))
+
+            if cursor.rowcount == 0:
+                return False
 
-        if cursor.rowcount == 0:
-            return False
-        conn.commit()
         return True
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
 # ==================== FETCHES ===================== #
 
+@instrumented
 def get_vehicles():
     try:
-        cursor.execute("SELECT * FROM registered_cars")
-        return cursor.fetchall()
+        with connection() as conn:
+            return conn.execute("SELECT * FROM registered_cars").fetchall()
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
         return None
 
+@instrumented
 def get_vehicle_owner(owner_id):
     try:
-        cursor.execute("SELECT owner_name FROM car_owners WHERE id = ?", (owner_id,))
-        owner_name = cursor.fetchone()
+        with connection() as conn:
+            owner_name = conn.execute("SELECT owner_name FROM car_owners WHERE id = ?", (owner_id,)).fetchone()
 
         if owner_name:
             return owner_name[0]
 
         return None
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
         return None
 
+@instrumented
 def check_plate_number(plate_number) -> bool:
     try:
-        cursor.execute("SELECT id FROM registered_cars WHERE plate_number =?", (plate_number,))
-        plate_number = cursor.fetchone()
+        with connection() as conn:
+            plate_number = conn.execute("SELECT id FROM registered_cars WHERE plate_number =?", (plate_number,)).fetchone()
 
         if plate_number:
             return True
 
         return False
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
         return False
 
+@instrumented
 def record_found(owner_name: str = None):
     try:
-        cursor.execute("SELECT * FROM car_owners WHERE owner_name = ?", (owner_name,))
-        owner = cursor.fetchone()
+        with connection() as conn:
+            owner = conn.execute("SELECT * FROM car_owners WHERE owner_name = ?", (owner_name,)).fetchone()
 
         if owner:
             return True
 
         return False
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return False
 
+@instrumented
 def get_reservations():
     try:
-        cursor.execute("SELECT * FROM reservations")
-        reservations = cursor.fetchall()
+        with connection() as conn:
+            reservations = conn.execute("SELECT * FROM reservations").fetchall()
 
         if reservations:
             return reservations
 
         return None
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
         return None
 
-def get_res_id_details(slot_number):
+# Page size of get_reservations_page() unless one is given
+RESERVATION_PAGE_SIZE = 100
+
+# Keyset cursor of a reservation row: the page after it starts at the next (starts_at, id).
+# Legacy rows without a start sort first as -1; a NULL in the row comparison would end paging.
+def reservation_cursor(row):
+    return (-1 if row[13] is None else row[13]), row[0]
+
+# Reservations in (starts_at, id) order, `limit` at a time. Pass reservation_cursor() of the
+# last row as `after` for the next page; a page shorter than `limit` is the last one.
+# Dates are "YYYY-MM-DD" and inclusive.
+@instrumented
+def get_reservations_page(after=None, limit=RESERVATION_PAGE_SIZE, status=None, date_from=None, date_to=None, slot_number=None):
     try:
-        current_datetime = ph_time
-        current_date =  current_datetime.strftime("%m-%d-%Y")
-        current_time = current_datetime.strftime("%H:%M")
-
-        cursor.execute('''
-            SELECT r.* FROM reservations r
-            JOIN accepted_reservations ar ON r.id = ar.reservation_id
-            WHERE ar.slot_number = ?
-            AND (
-                r.reservation_date > ? OR
-                (r.reservation_date = ? AND r.reservation_time >= ?)
-            )
-            ORDER BY r.reservation_date ASC, r.reservation_time ASC
-            LIMIT 1
-        ''', (slot_number, current_date, current_date, current_time))
+        clauses = []
+        params = []
+
+        if after:
+            # The first comparison alone lets SQLite seek the page index; the row value breaks ties on id.
+            clauses.append("COALESCE(starts_at, -1) >= ? AND (COALESCE(starts_at, -1), id) > (?, ?)")
+            params.extend([after[0], *after])
+
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        if date_from:
+            clauses.append("starts_at >= ?")
+            params.append(to_epoch(date_from, "00:00", "%Y-%m-%d"))
+
+        if date_to:
+            clauses.append("starts_at < ?")
+            params.append(to_epoch(date_to, "00:00", "%Y-%m-%d") + 24 * 3600)
+
+        if slot_number:
+            clauses.append("assigned_slot = ?")
+            params.append(slot_number)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with connection() as conn:
+            return conn.execute(f"SELECT * FROM reservations {where} ORDER BY COALESCE(starts_at, -1), id LIMIT ?",
+                                params + [limit]).fetchall()
+    except Exception as e:
+        report_error(e)
+        return []
+
+# Reservations written and ids deleted after row revision `since`, with the revision to pass
+# next time; None when deletions that old are no longer remembered and the caller must reload
+@instrumented
+def get_reservation_changes(since=0):
+    try:
+        with connection() as conn:
+            revision = conn.execute("SELECT revision FROM table_revisions WHERE table_name = 'reservation_rows'").fetchone()[0]
+            floor = conn.execute("SELECT value FROM app_meta WHERE key = 'reservation_tombstone_floor'").fetchone()
+
+            if floor and since < int(floor[0]):
+                return None
+
+            changed = conn.execute("SELECT * FROM reservations WHERE revision > ? AND revision <= ? ORDER BY revision",
+                                   (since, revision)).fetchall()
+            deleted = [row[0] for row in conn.execute(
+                "SELECT reservation_id FROM reservation_tombstones WHERE revision > ? AND revision <= ?", (since, revision))]
 
-        next_reservation = cursor.fetchone()
+        return {"revision": revision, "changed": changed, "deleted": deleted}
+    except Exception as e:
+        report_error(e)
+        return None
+
+@instrumented
+def get_reservation_revision():
+    try:
+        with connection() as conn:
+            return conn.execute("SELECT revision FROM table_revisions WHERE table_name = 'reservation_rows'").fetchone()[0]
+    except Exception as e:
+        report_error(e)
+        return 0
+
+@instrumented
+def get_reservations_by_id(reservation_ids):
+    try:
+        reservation_ids = list(reservation_ids)
+        reservations = {}
+
+        with connection() as conn:
+            for i in range(0, len(reservation_ids), 500):
+                chunk = reservation_ids[i:i + 500]
+                for row in conn.execute(f"SELECT * FROM reservations WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+                    reservations[row[0]] = row
+
+        return reservations
+    except Exception as e:
+        report_error(e)
+        return {}
+
+@instrumented
+def get_res_id_details(slot_number):
+    try:
+        now = now_epoch()
+
+        # Late reservations stay current until their grace period runs out.
+        with connection() as conn:
+            next_reservation = conn.execute('''
+                SELECT r.* FROM reservations r
+                WHERE r.assigned_slot = ?
+                AND (
+                    r.starts_at >= ? OR
+                    (r.is_late = 1 AND r.grace_ends_at >= ?)
+                )
+                AND EXISTS (
+                    SELECT 1 FROM accepted_reservations ar
+                    WHERE ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+                )
+                ORDER BY r.starts_at ASC
+                LIMIT 1
+            ''', (slot_number, now, now)).fetchone()
 
         if next_reservation:
             return next_reservation
@@ -303,83 +571,242 @@ def get_res_id_details(slot_number):
         return None
 
     except Exception as e:
-        print(f"Error Occurred! {e}")
+        report_error(e)
+        return None
+
+# Next reservation of every slot in one query, keyed by slot number
+@instrumented
+def get_next_reservations():
+    try:
+        now = now_epoch()
+
+        with connection() as conn:
+            rows = conn.execute('''
+                SELECT * FROM (
+                    SELECT r.*, ROW_NUMBER() OVER (PARTITION BY r.assigned_slot ORDER BY r.starts_at ASC) AS next_rank
+                    FROM reservations r
+                    WHERE (
+                        r.starts_at >= ? OR
+                        (r.is_late = 1 AND r.grace_ends_at >= ?)
+                    )
+                    AND EXISTS (
+                        SELECT 1 FROM accepted_reservations ar
+                        WHERE ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+                    )
+                )
+                WHERE next_rank = 1
+            ''', (now, now)).fetchall()
+
+        # Drop next_rank so rows match get_res_id_details().
+        return {row[10]: row[:-1] for row in rows}
+    except Exception as e:
+        report_error(e)
+        return {}
+
+# Public state of every slot, for displays: no names or plates. Returns ({slot_number: state},
+# epoch at which some state next changes by the clock alone, or None), or None on error.
+@instrumented
+def get_slot_states():
+    try:
+        now = now_epoch()
+        upcoming = get_next_reservations()
+
+        with connection() as conn:
+            slots = conn.execute("SELECT slot_number, is_occupied, vehicle_class, zone, level FROM parking_slots").fetchall()
+
+        states = {}
+        next_change = None
+
+        for slot_number, is_occupied, slot_class, zone, level in slots:
+            reservation = upcoming.get(slot_number)
+            reserved_from = changes_at = None
+
+            if reservation and reservation[11] and reservation[14] and reservation[14] >= now:
+                reserved_from, changes_at = reservation[13], reservation[14] + 1
+            elif reservation and reservation[13] - COUNTDOWN_WINDOW <= now:
+                reserved_from, changes_at = reservation[13], reservation[13]
+            elif reservation:
+                changes_at = reservation[13] - COUNTDOWN_WINDOW
+
+            if changes_at is not None and (next_change is None or changes_at < next_change):
+                next_change = changes_at
+
+            states[slot_number] = {"state": "occupied" if is_occupied else "reserved" if reserved_from else "free",
+                                   "reserved_from": reserved_from, "vehicle_class": slot_class, "zone": zone, "level": level}
+
+        return states, next_change
+    except Exception as e:
+        report_error(e)
+        return None
+
+@instrumented
+def get_reservation_window(reservation_id):
+    try:
+        with connection() as conn:
+            return conn.execute("SELECT starts_at, ends_at FROM reservations WHERE id = ?", (reservation_id,)).fetchone()
+    except Exception as e:
+        report_error(e)
+        return None
+
+# (slot_number, starts_at, ends_at, id) of every reservation currently holding a slot
+@instrumented
+def get_approved_intervals():
+    try:
+        with connection() as conn:
+            # Only windows not yet over: auto-assign never places anything in the past.
+            return conn.execute('''
+                SELECT r.assigned_slot, r.starts_at, r.ends_at, r.id FROM reservations r
+                WHERE r.ends_at > ? AND EXISTS (
+                    SELECT 1 FROM accepted_reservations ar
+                    WHERE ar.reservation_id = r.id AND ar.slot_number = r.assigned_slot
+                )
+            ''', (now_epoch(),)).fetchall()
+    except Exception as e:
+        report_error(e)
+        return []
+
+_slot_index = SlotIntervalIndex()
+_slot_index_changes = ChangeTracker()
+_slot_index_lock = threading.Lock()
+
+# In-memory interval index of approved reservations, reloaded after any reservation change
+def get_slot_index():
+    with _slot_index_lock:
+        if _slot_index_changes.changed("reservations", "accepted_reservations"):
+            _slot_index.load(get_approved_intervals())
+
+    return _slot_index
+
+# Slots free for all of [starts_at, ends_at) that fit the vehicle; None if they could not be worked out
+@instrumented
+def get_free_slots(starts_at, ends_at, vehicle_type=None):
+    try:
+        matrix = get_availability().matrix(starts_at)
+        free = matrix.free_mask(starts_at, ends_at, vehicle_type, now_epoch()).nonzero()[0]
+
+        return [matrix.slot_numbers[i] for i in free]
+    except Exception as e:
+        report_error(e)
+        return None
+
+# Free slots in each time slot of a "YYYY-MM-DD" day, as {"HH:MM": count}
+@instrumented
+def get_slot_capacity(reservation_date, span_minutes=60, vehicle_type=None):
+    try:
+        day_start = to_epoch(reservation_date, "00:00", "%Y-%m-%d")
+        counts = get_availability().matrix(day_start).capacity(span_minutes * 60, vehicle_type)
+
+        return {from_epoch(day_start + i * span_minutes * 60).strftime("%H:%M"): int(count) for i, count in enumerate(counts)}
+    except Exception as e:
+        report_error(e)
+        return None
+
+# Remaining capacity of each reservation form time slot on a "YYYY-MM-DD" day: free compatible
+# slots minus the pending requests of the same vehicle class that will compete for them
+@instrumented
+def get_time_slot_availability(reservation_date, vehicle_type=None):
+    try:
+        capacity = get_slot_capacity(reservation_date, DEFAULT_DURATION_MINUTES, vehicle_type)
+        day_start = to_epoch(reservation_date, "00:00", "%Y-%m-%d")
+
+        with connection() as conn:
+            pending = conn.execute('''SELECT starts_at, vehicle_type FROM reservations
+                                      WHERE status = 'PENDING' AND starts_at >= ? AND starts_at < ?''',
+                                   (day_start, day_start + 24 * 3600)).fetchall()
+
+        wanted = vehicle_class(vehicle_type) if vehicle_type else None
+        waiting = {}
+
+        for starts_at, pending_type in pending:
+            if wanted is None or vehicle_class(pending_type) == wanted:
+                time = from_epoch(starts_at).strftime("%H:00")
+                waiting[time] = waiting.get(time, 0) + 1
+
+        return [{"time": time, "free": capacity[time], "pending": waiting.get(time, 0),
+                 "remaining": max(0, capacity[time] - waiting.get(time, 0))} for time in RESERVATION_TIMES]
+    except Exception as e:
+        report_error(e)
         return None
 
+@instrumented
 def get_owner(owner_name: str):
     try:
-        cursor.execute("SELECT id, owner_name, type, contact_number, email FROM car_owners WHERE owner_name = ? COLLATE NOCASE",
-                       (owner_name,))
-        return cursor.fetchone()
+        with connection() as conn:
+            return conn.execute("SELECT id, owner_name, type, contact_number, email FROM car_owners WHERE owner_name = ? COLLATE NOCASE",
+                                (owner_name,)).fetchone()
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return None
 
 
 # Fetch All Car Owners
+@instrumented
 def get_car_owners():
     try:
-        cursor.execute("SELECT * FROM car_owners")
-        return cursor.fetchall()
+        with connection() as conn:
+            return conn.execute("SELECT * FROM car_owners").fetchall()
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return None
 
 
 # Fetch All Vehicles of Car Owner
+@instrumented
 def get_owner_vehicles(owner_name):
     try:
-        cursor.execute("SELECT id FROM car_owners WHERE owner_name = ? COLLATE NOCASE", (owner_name,))
-        owner_id = cursor.fetchone()
-        owner_id = owner_id[0]
+        with connection() as conn:
+            owner_id = conn.execute("SELECT id FROM car_owners WHERE owner_name = ? COLLATE NOCASE", (owner_name,)).fetchone()
+            owner_id = owner_id[0]
 
-        cursor.execute("SELECT * FROM registered_cars WHERE owner_id = ?", (owner_id,))
-        return cursor.fetchall()
+            return conn.execute("SELECT * FROM registered_cars WHERE owner_id = ?", (owner_id,)).fetchall()
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return None
 
 
+@instrumented
 def get_vehicle_type(plate_number):
     try:
-        cursor.execute("SELECT vehicle_type FROM registered_cars WHERE plate_number = ?", (plate_number,))
-        return cursor.fetchone()
+        with connection() as conn:
+            return conn.execute("SELECT vehicle_type FROM registered_cars WHERE plate_number = ?", (plate_number,)).fetchone()
     except Exception as e:
-        print("Error Occurred!", e)
+        report_error(e)
         return None
 
 # Fetch all Parking Slots
+@instrumented
 def get_parking_slots():
     try:
-        cursor.execute("SELECT * FROM parking_slots")
-        return cursor.fetchall()
+        with connection() as conn:
+            return conn.execute("SELECT * FROM parking_slots").fetchall()
     except Exception as e:
-        print(f"Error Occurred!", e)
+        report_error(e)
         return None
 
+@instrumented
 def get_parkslot_info(slot_number):
     try:
-        cursor.execute("SELECT * FROM parking_slots WHERE slot_number = ?", (slot_number,))
-        return cursor.fetchone()
+        with connection() as conn:
+            return conn.execute("SELECT * FROM parking_slots WHERE slot_number = ?", (slot_number,)).fetchone()
     except Exception as e:
-        print(f"Error Occurred!", e)
+        report_error(e)
         return None
 
+@instrumented
 def edit_car_owner(owner_name, owner_type, owner_email, owner_contact):
     try:
-        cursor.execute('''UPDATE car_owners
-                        SET type = ?,
-                            email = ?,
-                            contact_number = ?
-                        WHERE owner_name = ?
-        ''', (owner_type, owner_email, owner_contact, owner_name))
+        with transaction() as conn:
+            cursor = conn.execute('''UPDATE car_owners
+                                    SET type = ?,
+                                        email = ?,
+                                        contact_number = ?
+                                    WHERE owner_name = ?
+            ''', (owner_type, owner_email, owner_contact, owner_name))
 
-        if cursor.rowcount == 0:
-            return False
+            if cursor.rowcount == 0:
+                return False
 
-        conn.commit()
         return True
     except Exception as e:
-        print(f"Error Occurred!", e)
+        report_error(e)
         return False
-
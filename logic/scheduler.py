@@ -0,0 +1,84 @@
+import heapq
+import itertools
+from db.timeutil import now_epoch
+
+# How long before the start a reservation's countdown shows on its slot
+COUNTDOWN_WINDOW = 3600
+
+
+class DeadlineScheduler:
+    """Min-heap of the moments approved reservations change state.
+
+    Each reservation gets up to three deadlines: "show" when its countdown
+    appears, "late" a second before it starts and "expire" when its grace
+    period ends. Re-arming a reservation whose times changed leaves the old
+    entries in the heap; they are dropped when popped instead of searched for.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._armed = {}
+        self._counter = itertools.count()
+
+    def _push(self, when, kind, slot_number, reservation_id, signature):
+        heapq.heappush(self._heap, (when, next(self._counter), kind, slot_number, reservation_id, signature))
+
+    def arm(self, slot_number, reservation, now=None):
+        now = now_epoch() if now is None else now
+        reservation_id, is_late, starts_at, grace_ends_at = reservation[0], reservation[11], reservation[13], reservation[14]
+        signature = (slot_number, is_late, starts_at, grace_ends_at)
+
+        if self._armed.get(reservation_id) == signature:
+            return
+
+        self._armed[reservation_id] = signature
+
+        if is_late:
+            if grace_ends_at:
+                self._push(grace_ends_at, "expire", slot_number, reservation_id, signature)
+        elif starts_at:
+            if starts_at - COUNTDOWN_WINDOW > now:
+                self._push(starts_at - COUNTDOWN_WINDOW, "show", slot_number, reservation_id, signature)
+            self._push(starts_at - 1, "late", slot_number, reservation_id, signature)
+
+    def disarm(self, reservation_id):
+        self._armed.pop(reservation_id, None)
+
+    def sync(self, next_reservations, now=None):
+        """Arm the given {slot_number: reservation} rows and forget every other reservation."""
+        wanted = {reservation[0] for reservation in next_reservations.values()}
+
+        for reservation_id in [key for key in self._armed if key not in wanted]:
+            self.disarm(reservation_id)
+
+        for slot_number, reservation in next_reservations.items():
+            self.arm(slot_number, reservation, now)
+
+    def pop_due(self, now=None):
+        """Remove and return (kind, slot_number, reservation_id) for every deadline up to now."""
+        now = now_epoch() if now is None else now
+        due = []
+
+        while self._heap and self._heap[0][0] <= now:
+            when, _, kind, slot_number, reservation_id, signature = heapq.heappop(self._heap)
+
+            if self._armed.get(reservation_id) != signature:
+                continue
+
+            # A reservation leaves the schedule once it is late-marked or cancelled; the
+            # refresh that follows re-arms it with its new times.
+            if kind != "show":
+                self.disarm(reservation_id)
+
+            due.append((kind, slot_number, reservation_id))
+
+        return due
+
+    def next_deadline(self):
+        while self._heap and self._armed.get(self._heap[0][4]) != self._heap[0][5]:
+            heapq.heappop(self._heap)
+
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._armed)
@@ -1,10 +1,11 @@
 import psutil
-from db.database import init_db
+from db.database import init_db, start_reservation_cleanup
 from ui.dashboard import App
 process = psutil.Process()
 
 
 init_db()
+start_reservation_cleanup()
 
 app = App()
 app.mainloop()
@@ -0,0 +1,449 @@
+let currentStepNum = 1;
+let totalSteps = 10;
+let currentMonth = new Date().getMonth();
+let currentYear = new Date().getFullYear();
+let selectedDate = null;
+let selectedTime = null;
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    setRequestToken();
+    updateCalendar();
+    setupInputValidation();
+});
+
+function setRequestToken() {
+    const token = document.getElementById('requestToken');
+
+    // Keep the token a refreshed page restored, so re-posting it is recognised
+    if (!token.value) {
+        token.value = (window.crypto && crypto.randomUUID) ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+}
+
+function nextStep() {
+    if (currentStepNum < totalSteps) {
+        if (validateCurrentStep()) {
+            const currentStep = document.getElementById(`step-${currentStepNum}`);
+            console.log(currentStep);
+            currentStepNum++;
+            const nextStep = document.getElementById(`step-${currentStepNum}`);
+
+            currentStep.classList.remove('active');
+            setTimeout(() => {
+                nextStep.classList.add('active');
+                updateProgress();
+                updateStepCounter();
+
+                if (currentStepNum === 10) {
+                    updateReview();
+                }
+            }, 200);
+        }
+    }
+}
+
+function prevStep() {
+    if (currentStepNum > 1) {
+        const currentStep = document.getElementById(`step-${currentStepNum}`);
+        currentStepNum--;
+        const prevStep = document.getElementById(`step-${currentStepNum}`);
+
+        currentStep.classList.remove('active');
+        setTimeout(() => {
+            prevStep.classList.add('active');
+            updateProgress();
+            updateStepCounter();
+        }, 200);
+    }
+}
+
+function updateProgress() {
+    const progress = (currentStepNum / totalSteps) * 100;
+    document.getElementById('progressFill').style.width = progress + '%';
+}
+
+function updateStepCounter() {
+    document.getElementById('currentStep').textContent = currentStepNum;
+}
+
+function validateCurrentStep() {
+    switch(currentStepNum) {
+        case 2:
+            return document.getElementById('name').value.trim() !== '';
+        case 3:
+            return document.getElementById('email').value.trim() !== '' &&
+                document.getElementById('email').validity.valid;
+        case 4:
+            return document.getElementById('contact').value.trim() !== '';
+        case 5:
+            return document.getElementById('plate').value.trim() !== '';
+        case 6:
+            return document.getElementById('vehicle').value.trim() !== '';
+        case 7:
+            return selectedDate !== null;
+        case 8:
+            return selectedTime !== null;
+        case 9:
+            return document.getElementById('ownerType').value !== '';
+        default:
+            return true;
+    }
+}
+
+function setupInputValidation() {
+    // Name validation
+    document.getElementById('name').addEventListener('input', function() {
+        const btn = document.getElementById('btn-step-2');
+        btn.disabled = this.value.trim() === '';
+    });
+
+    // Email validation
+    document.getElementById('email').addEventListener('input', function() {
+        const btn = document.getElementById('btn-step-3');
+        btn.disabled = this.value.trim() === '' || !this.validity.valid;
+    });
+
+    // Contact formatting and validation
+    const contactInput = document.getElementById('contact');
+    contactInput.addEventListener('input', function() {
+        let value = this.value.replace(/\D/g, '');
+
+        if (value.length >= 7) {
+            value = value.substring(0, 4) + '-' + value.substring(4, 7) + '-' + value.substring(7, 11);
+        } else if (value.length >= 4) {
+            value = value.substring(0, 4) + '-' + value.substring(4);
+        }
+
+        this.value = value;
+
+        // Update hidden field with clean number
+        const cleanNumber = this.value.replace(/\D/g, '');
+        document.getElementById('contactHidden').value = cleanNumber;
+
+        const btn = document.getElementById('btn-step-4');
+        btn.disabled = cleanNumber.length < 11;
+    });
+
+    // Plate number validation
+    document.getElementById('plate').addEventListener('input', function() {
+        let value = this.value.replace(/[^A-Za-z0-9]/g, '').toUpperCase();
+        let formatted = '';
+
+        if (value.length > 0) {
+            let letters = value.substring(0, 3).replace(/[0-9]/g, '');
+            formatted += letters;
+        }
+
+        if (value.length > 3) {
+            if (formatted.length === 3) {
+                formatted += ' ';
+            }
+
+            let numbers = value.substring(3).replace(/[A-Z]/g, '');
+            formatted += numbers.substring(0, 4);
+        }
+
+        this.value = formatted;
+
+        const isValid = /^[A-Z]{3} [0-9]{4}$/.test(formatted);
+        const btn = document.getElementById('btn-step-5');
+        btn.disabled = !isValid;
+    });
+
+    document.getElementById('vehicle').addEventListener('focus', function() {
+        const cards = document.querySelectorAll('.vehicle-card');
+
+        cards.forEach(card => {
+            if (card.classList.contains('selected')) {
+                this.value = '';
+                card.classList.remove('selected');
+            }
+        })
+    });
+
+    document.getElementById('vehicle').addEventListener('input', function() {
+        let value = this.value.trim().toLowerCase()
+
+        const cards = document.querySelectorAll('.vehicle-card');
+
+        cards.forEach(card => {
+            card.classList.remove('selected');
+
+            const cardText = card.querySelector('p').textContent;
+
+            if (value && value === cardText.toLowerCase()) {
+                card.classList.add('selected');
+            }
+
+            if (value && value === cardText.toLowerCase()) {
+                this.value = '' + cardText;
+            }
+        })
+    });
+}
+
+function handleEnter(event, nextStepNum) {
+    if (event.key === 'Enter') {
+        event.preventDefault();
+        if (validateCurrentStep()) {
+            nextStep();
+        }
+    }
+}
+
+function selectVehicle(type) {
+    const cards = document.querySelectorAll('.vehicle-card');
+    cards.forEach(card => card.classList.remove('selected'));
+
+    event.currentTarget.classList.add('selected');
+    document.getElementById('vehicle').value = type;
+
+    const btn = document.getElementById('btn-step-6');
+    btn.disabled = false;
+}
+
+function selectType(type) {
+    const cards = document.querySelectorAll('.type-card');
+    cards.forEach(card => card.classList.remove('selected'));
+
+    event.currentTarget.classList.add('selected');
+    document.getElementById('ownerType').value = type
+
+    const btn = document.getElementById('btn-step-9')
+    btn.disabled = false;
+}
+
+// Calendar Functions
+function updateCalendar() {
+    const monthNames = ["January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December"];
+
+    document.getElementById('monthYear').textContent = `${monthNames[currentMonth]} ${currentYear}`;
+
+    const dateGrid = document.getElementById('dateGrid');
+    dateGrid.innerHTML = '';
+
+    const firstDay = new Date(currentYear, currentMonth, 1).getDay();
+    const daysInMonth = new Date(currentYear, currentMonth + 1, 0).getDate();
+    const today = new Date();
+
+    // Add empty cells for days before the first day of the month
+    for (let i = 0; i < firstDay; i++) {
+        const emptyCell = document.createElement('div');
+        dateGrid.appendChild(emptyCell);
+    }
+
+    // Add days of the month
+    for (let day = 1; day <= daysInMonth; day++) {
+        const dateCell = document.createElement('div');
+        dateCell.className = 'date-cell';
+        dateCell.textContent = day;
+
+        const cellDate = new Date(currentYear, currentMonth, day);
+
+        if (cellDate < today.setHours(0,0,0,0)) {
+            dateCell.classList.add('disabled');
+        } else {
+            dateCell.addEventListener('click', () => selectDate(day));
+        }
+
+        dateGrid.appendChild(dateCell);
+    }
+}
+
+function changeMonth(direction) {
+    currentMonth += direction;
+    if (currentMonth < 0) {
+        currentMonth = 11;
+        currentYear--;
+    } else if (currentMonth > 11) {
+        currentMonth = 0;
+        currentYear++;
+    }
+    updateCalendar();
+}
+
+function validateTimeSlots() {
+    const timeSlots = document.querySelectorAll('.time-slot');
+    const today = new Date();
+
+    // Check if selected date is today
+    const timezoneOffset = selectedDate.getTimezoneOffset() * 60000;
+    const localDate = new Date(selectedDate.getTime() - timezoneOffset);
+    const isToday = localDate.toDateString() === today.toDateString();
+
+    if (isToday) {
+        // Get current time in minutes
+        const currentHour = today.getHours();
+        const currentMinute = today.getMinutes();
+        const currentTimeInMinutes = currentHour * 60 + currentMinute;
+
+        const bufferMinutes = 60;
+        const minimumBookingTime = currentTimeInMinutes + bufferMinutes;
+
+        // Check each time slot
+        timeSlots.forEach(slot => {
+            // Extract the time from the onclick attribute instead of text content
+            const onclickAttr = slot.getAttribute('onclick');
+            const timeMatch = onclickAttr.match(/selectTime\('(\d{2}:\d{2})'\)/);
+
+            if (timeMatch) {
+                const slotTime = timeMatch[1]; // This will be in 24-hour format like '08:00'
+                const [slotHour, slotMinute] = slotTime.split(':').map(Number);
+                const slotTimeInMinutes = slotHour * 60 + slotMinute;
+
+                if (slotTimeInMinutes <= minimumBookingTime) {
+                    slot.classList.add('disabled');
+                    // Add pointer-events: none to prevent clicking
+                    slot.style.pointerEvents = 'none';
+                } else {
+                    slot.classList.remove('disabled');
+                    slot.style.pointerEvents = 'auto';
+                }
+            }
+        });
+    } else {
+        // If not today, enable all time slots
+        timeSlots.forEach(slot => {
+            slot.classList.remove('disabled');
+            slot.style.pointerEvents = 'auto';
+        });
+    }
+}
+
+// Grey out time slots the lot has no room left for, on top of the time buffer above
+function loadAvailability(date) {
+    const vehicle = document.getElementById('vehicle').value;
+    const params = new URLSearchParams({ date: date });
+    if (vehicle) params.append('vehicle_type', vehicle);
+
+    fetch(`/availability?${params}`)
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || document.getElementById('reservationDate').value !== date) return;
+
+            const remaining = {};
+            data.slots.forEach(slot => remaining[slot.time] = slot.remaining);
+
+            document.querySelectorAll('.time-slot').forEach(slot => {
+                const timeMatch = slot.getAttribute('onclick').match(/selectTime\('(\d{2}:\d{2})'\)/);
+
+                if (timeMatch && remaining[timeMatch[1]] === 0) {
+                    slot.classList.add('disabled');
+                    slot.style.pointerEvents = 'none';
+                    slot.title = 'Fully booked';
+                } else {
+                    slot.title = '';
+                }
+            });
+        })
+        .catch(() => {});
+}
+
+// Updated selectDate function
+function selectDate(day) {
+    const dateCells = document.querySelectorAll('.date-cell');
+    dateCells.forEach(cell => cell.classList.remove('selected'));
+
+    event.currentTarget.classList.add('selected');
+
+    selectedDate = new Date(currentYear, currentMonth, day);
+    console.log(selectedDate);
+
+    // Apply timezone offset to get local date string
+    const timezoneOffset = selectedDate.getTimezoneOffset() * 60000;
+    const localDate = new Date(selectedDate.getTime() - timezoneOffset);
+    const formattedDate = localDate.toISOString().split('T')[0];
+
+    console.log(formattedDate);
+    document.getElementById('reservationDate').value = formattedDate;
+
+    // Validate time slots after selecting date
+    validateTimeSlots();
+    loadAvailability(formattedDate);
+
+    const btn = document.getElementById('btn-step-7');
+    btn.disabled = false;
+}
+
+// Updated selectTime function
+function selectTime(time) {
+    const timeSlots = document.querySelectorAll('.time-slot');
+    timeSlots.forEach(slot => slot.classList.remove('selected'));
+
+    // Check if trying to select a disabled time slot
+    if (event.currentTarget.classList.contains('disabled')) {
+        alert('Please select an available time slot.');
+        return;
+    }
+
+    event.currentTarget.classList.add('selected');
+    selectedTime = time;
+    document.getElementById('reservationTime').value = time;
+
+    const btn = document.getElementById('btn-step-8');
+    btn.disabled = false;
+}
+
+function updateReview() {
+    document.getElementById('reviewName').textContent = document.getElementById('name').value;
+    document.getElementById('reviewEmail').textContent = document.getElementById('email').value;
+    document.getElementById('reviewContact').textContent = document.getElementById('contact').value;
+    document.getElementById('reviewPlate').textContent = document.getElementById('plate').value;
+    document.getElementById('reviewVehicle').textContent = document.getElementById('vehicle').value;
+
+    const dateOptions = { year: 'numeric', month: 'long', day: 'numeric' };
+    document.getElementById('reviewDate').textContent = selectedDate.toLocaleDateString('en-US', dateOptions);
+
+    const timeOptions = { hour: 'numeric', minute: '2-digit', hour12: true };
+    const timeDate = new Date(`2000-01-01T${selectedTime}:00`);
+    document.getElementById('reviewTime').textContent = timeDate.toLocaleTimeString('en-US', timeOptions);
+
+    document.getElementById('reviewType').textContent = document.getElementById('ownerType').value;
+}
+
+function resetForm() {
+    currentStepNum = 1;
+    selectedDate = null;
+    selectedTime = null;
+
+    // Reset all form fields
+    document.getElementById('typeformReservation').reset();
+
+    // Reset all steps
+    const steps = document.querySelectorAll('.step');
+    steps.forEach(step => step.classList.remove('active'));
+    document.getElementById('step-1').classList.add('active');
+
+    // Reset progress
+    updateProgress();
+    updateStepCounter();
+
+    // Reset button states
+    const buttons = document.querySelectorAll('[id^="btn-step-"]');
+    buttons.forEach(btn => btn.disabled = true);
+
+    // Reset selections
+    const cards = document.querySelectorAll('.vehicle-card');
+    cards.forEach(card => card.classList.remove('selected'));
+
+    const type_cards = document.querySelectorAll('.type-card');
+    type_cards.forEach(card => card.classList.remove('selected'));
+
+    const timeSlots = document.querySelectorAll('.time-slot');
+    timeSlots.forEach(slot => slot.classList.remove('selected'));
+}
+
+// Form submission enhancement
+document.getElementById('typeformReservation').addEventListener('submit', function(e) {
+    const submitBtn = e.target.querySelector('button[type="submit"]');
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Processing...';
+    submitBtn.disabled = true;
+});
+
+// Mobile optimization
+if (window.innerWidth <= 768) {
+    document.addEventListener('touchstart', function() {}, true);
+}
@@ -1,8 +1,10 @@
+import os
 import re
+from bisect import bisect_left
 import tkinter as tk
 import tkinter.font as tkFont
 from tkinter import messagebox, ttk
-from datetime import datetime, timezone, timedelta
+from datetime import datetime
 
 from PIL import Image, ImageTk, ImageSequence
 
@@ -10,9 +12,55 @@ from logic.auth import account_login, account_creation, account_deletion, get_al
     account_edit
 from logic.models import new_car_owner, get_car_owners, get_owner_vehicles, record_found, get_owner, get_vehicle_type, \
     park_vehicle, get_parking_slots, unpark_vehicle, get_parkslot_info, assign_vehicle, \
-    check_plate_number, get_vehicles, get_vehicle_owner, get_reservations, get_res_id_details, \
+    check_plate_number, get_vehicles, get_vehicle_owner, get_reservations_page, get_reservations_by_id, reservation_cursor, \
+    get_reservation_changes, get_reservation_revision, \
+    get_res_id_details, get_next_reservations, \
     accept_reservation, reject_reservation, update_reservation_late_status, cancel_accepted_reservation, \
-    unassign_vehicle, delete_car_owner, edit_car_owner, delete_reservation
+    unassign_vehicle, delete_car_owner, edit_car_owner, delete_reservation, get_reservation_window, get_free_slots, \
+    preview_auto_assign, apply_auto_assign
+from logic.scheduler import DeadlineScheduler
+from db.changes import ChangeTracker
+from db.timeutil import now_epoch, from_epoch, to_epoch
+from db.instrumentation import registry
+
+# Tables the home page reads; a refresh is skipped while none of them changed
+HOME_TABLES = ("car_owners", "registered_cars", "parking_slots", "reservations", "accepted_reservations")
+
+# Reservations fetched per page: a screenful plus a prefetch window
+RESERVATION_PAGE_ROWS = 100
+
+
+def reservation_tag(reservation):
+    if reservation[9] == "PENDING":
+        return "pending"
+    elif reservation[9] == "APPROVED":
+        return "approved"
+
+    return "rejected"
+
+
+# Sort key of a reservations table row from its keyset cursor; SQLite sorts a missing start first
+def table_key(starts_at, reservation_id):
+    return (-1 if starts_at is None else starts_at), reservation_id
+
+
+# Whether a reservation row passes the reservation page's filters, the way get_reservations_page applies them
+def reservation_matches(reservation, filters):
+    starts_at = reservation[13]
+
+    if filters.get("status") and reservation[9] != filters["status"]:
+        return False
+
+    if filters.get("slot_number") and reservation[10] != filters["slot_number"]:
+        return False
+
+    if filters.get("date_from") and (starts_at is None or starts_at < to_epoch(filters["date_from"], "00:00", "%Y-%m-%d")):
+        return False
+
+    if filters.get("date_to") and (starts_at is None or starts_at >= to_epoch(filters["date_to"], "00:00", "%Y-%m-%d") + 24 * 3600):
+        return False
+
+    return True
 
 
 class App(tk.Tk):
@@ -33,6 +81,16 @@ class App(tk.Tk):
 
         self.show_frame(LoginScreen)
 
+        self.bind_all("<F12>", self.dump_query_metrics)
+
+    def dump_query_metrics(self, event=None):
+        try:
+            path = os.path.join(os.path.expanduser("~"), "USAParkingManager", "query_metrics.json")
+            registry.dump_json(path)
+            messagebox.showinfo("Query Metrics", f"Query metrics saved to\n{path}")
+        except Exception as e:
+            print(f"Error dumping query metrics: {e}")
+
     def _initialize_fonts(self):
         font_path = "ui/fonts/Helvetica.ttf"
         self.header_font = tkFont.Font(family=font_path, size=22, weight="bold")
@@ -341,7 +399,12 @@ class HomePage(tk.Frame):
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
-        self.previous_slot_status = {}
+        self.next_reservations = {}
+        self.slot_rows = {}
+        self.countdown_slots = []
+        self.scheduler = DeadlineScheduler()
+        self.timer_job = None
+        self.changes = ChangeTracker()
         self.park_slot_buttons = {}
 
         self._initialize_frame_titles()
@@ -361,11 +424,13 @@ class HomePage(tk.Frame):
 
     def refresh_data(self):
         self.fetch_database(None)
-        self.start_timer_updates()
+
+        if self.timer_job is None:
+            self.start_timer_updates()
 
     def start_timer_updates(self):
         self.update_timers_only()
-        self.after(1000, self.start_timer_updates)
+        self.timer_job = self.after(1000, self.start_timer_updates)
 
     def _initialize_inner_frames(self):
         self.frame_park_vehicle = tk.Frame(self, bg='#b80000', padx=10, pady=10)
@@ -448,30 +513,17 @@ class HomePage(tk.Frame):
         for slot in self.park_slots:
             slot_number = slot[1]
             slot_status = slot[2]
-            has_reservation = get_res_id_details(slot_number)
+            has_reservation = self.next_reservations.get(slot_number)
 
             upcoming_reservation = False  # Initialize as False
 
             if has_reservation:
-                res_date = datetime.strptime(has_reservation[7], "%m-%d-%Y")
-                res_time = datetime.strptime(has_reservation[8], "%H:%M")
-
-                # Get current date and time
-                current_date = datetime.now().date()
-                current_time = datetime.now().time()
+                # Check if current time is within 1 hour before reservation
+                time_diff = has_reservation[13] - now_epoch()
 
-                # Check if reservation is today
-                if res_date.date() == current_date:
-                    # Fix: Use .date() and .time() to extract the components properly
-                    reservation_datetime = datetime.combine(res_date.date(), res_time.time())
-                    current_datetime = datetime.now()
-
-                    # Check if current time is within 1 hour before reservation
-                    time_diff = reservation_datetime - current_datetime
-
-                    # If time difference is between 0 and 1 hour (3600 seconds)
-                    if 0 <= time_diff.total_seconds() <= 3600:
-                        upcoming_reservation = True
+                # If time difference is between 0 and 1 hour (3600 seconds)
+                if 0 <= time_diff <= 3600:
+                    upcoming_reservation = True
 
                 print(f"Slot {slot_number}: upcoming_reservation = {upcoming_reservation}")
 
@@ -487,17 +539,7 @@ class HomePage(tk.Frame):
             else:
                 bgcolor = "green"
 
-            timer_text = None
-            if has_reservation:
-                timer_text = self.reservation_timer(has_reservation[7], has_reservation[8])
-
-            if timer_text:
-                if slot_status == 0:
-                    pkg_text = f"{slot_number}\nAvailable\nReservation in: {timer_text}"
-                else:
-                    pkg_text = f"{slot_number}\n{slot[5]}\n{slot[3]}\nReservation in: {timer_text}"
-            else:
-                pkg_text = f"{slot_number}\nAvailable\n" if slot_status == 0 else f"{slot_number}\n{slot[5]}\n{slot[3]}"
+            pkg_text, _ = self._slot_text(slot, has_reservation)
 
             button = tk.Button(self.frame_park_slots, text=pkg_text, bg=bgcolor, fg=fgcolor, width=20,
                                command=lambda x=slot[1]: self.get_slot_info(x),
@@ -614,103 +656,66 @@ class HomePage(tk.Frame):
         self.grid_rowconfigure(2, weight=10)
 
     def update_timers_only(self):
-        """Update only the timer displays without refreshing database"""
+        """Fire reservation deadlines that are due and tick the countdowns on screen"""
         try:
-            timer_expired = False
-            reservation_cancelled = False
-
-            for slot in self.park_slots:
-                slot_number = slot[1]
-                slot_status = slot[2]
-
-                prev_status = self.previous_slot_status.get(slot_number)
-                has_reservation = get_res_id_details(slot_number)
-                current_status = (slot_status, has_reservation)
-
-                timer_text = None
-                just_expired = False
-                grace_timer_text = None
-
-                if has_reservation:
-                    # Check if reservation is late and get appropriate timer
-                    if has_reservation[11]:  # is_late is at index 11
-                        grace_result = self.grace_period_timer(has_reservation[12])  # grace_period_until at index 12
-                        if grace_result:
-                            grace_timer_text, grace_expired = grace_result
-                            if grace_expired:
-                                # Grace period expired - cancel the reservation
-                                print(
-                                    f"Grace period expired for reservation {has_reservation[0]} in slot {slot_number}")
-                                if cancel_accepted_reservation(has_reservation[0]):
-                                    print(f"Reservation {has_reservation[0]} cancelled successfully")
-                                    reservation_cancelled = True
-                                else:
-                                    print(f"Failed to cancel reservation {has_reservation[0]}")
-                                timer_expired = True
-                    else:
-                        timer_result = self.reservation_timer(has_reservation[7], has_reservation[8])
-                        if timer_result:
-                            timer_text, just_expired = timer_result
-                            if just_expired:
-                                # Set is_late to True in database
-                                self.set_reservation_late(has_reservation[0])  # Pass reservation ID
-                                timer_expired = True
-
-                should_update = (prev_status != current_status) or timer_text or grace_timer_text
-
-                if should_update:
-                    if grace_timer_text:
-                        if slot_status == 0:
-                            pkg_text = f"{slot_number}\nAvailable\nGrace period: {grace_timer_text}"
-                        else:
-                            pkg_text = f"{slot_number}\n{slot[5]}\n{slot[3]}\nGrace period: {grace_timer_text}"
-                    elif timer_text:
-                        if slot_status == 0:
-                            pkg_text = f"{slot_number}\nAvailable\nReservation in: {timer_text}"
-                        else:
-                            pkg_text = f"{slot_number}\n{slot[5]}\n{slot[3]}\nReservation in: {timer_text}"
+            due = self.scheduler.pop_due()
+
+            for kind, slot_number, reservation_id in due:
+                if kind == "late":
+                    self.set_reservation_late(reservation_id)
+                elif kind == "expire":
+                    print(f"Grace period expired for reservation {reservation_id} in slot {slot_number}")
+                    if cancel_accepted_reservation(reservation_id):
+                        print(f"Reservation {reservation_id} cancelled successfully")
                     else:
-                        pkg_text = f"{slot_number}\nAvailable\n" if slot_status == 0 else f"{slot_number}\n{slot[5]}\n{slot[3]}"
+                        print(f"Failed to cancel reservation {reservation_id}")
 
-                    if slot_number in self.park_slot_buttons:
-                        self.park_slot_buttons[slot_number].config(text=pkg_text)
+            if due:
+                self.fetch_database(None, force=True)
+                return
 
-            if timer_expired:
-                if reservation_cancelled:
-                    print("Reservation cancelled due to grace period expiration - refreshing database")
-                else:
-                    print("Timer expired - refreshing database")
-                self.fetch_database(None)
+            for slot_number in self.countdown_slots:
+                if slot_number in self.park_slot_buttons:
+                    pkg_text, _ = self._slot_text(self.slot_rows[slot_number], self.next_reservations.get(slot_number))
+                    self.park_slot_buttons[slot_number].config(text=pkg_text)
 
         except Exception as e:
             print(f"Timer update error!", e)
 
-    def reservation_timer(self, reservation_date, reservation_time):
-        try:
-            # GMT+8 timezone offset
-            ph_offset = timezone(timedelta(hours=8))
-            ph_time = datetime.now(ph_offset)
+    def _slot_text(self, slot, reservation):
+        """Button text for a slot, and whether it carries a running countdown"""
+        slot_number = slot[1]
+        slot_status = slot[2]
+        countdown = None
+
+        if reservation:
+            if reservation[11]:  # is_late - grace period countdown
+                grace_result = self.grace_period_timer(reservation[14])
+                if grace_result and grace_result[0]:
+                    countdown = f"Grace period: {grace_result[0]}"
+            else:
+                timer_result = self.reservation_timer(reservation[13])
+                if timer_result:
+                    countdown = f"Reservation in: {timer_result[0]}"
 
-            # Combine date and time
-            reservation_datetime_str = f"{reservation_date} {reservation_time}"
-            res_time = datetime.strptime(reservation_datetime_str, "%m-%d-%Y %H:%M")
+        if countdown:
+            if slot_status == 0:
+                return f"{slot_number}\nAvailable\n{countdown}", True
 
-            ph_time = ph_time.replace(tzinfo=None)
-            fake_ph_time = ph_time + timedelta(hours=2)
+            return f"{slot_number}\n{slot[5]}\n{slot[3]}\n{countdown}", True
 
-            # Check if reservation is today
-            if res_time.date() != ph_time.date():
-                return None
+        return (f"{slot_number}\nAvailable\n" if slot_status == 0 else f"{slot_number}\n{slot[5]}\n{slot[3]}"), False
 
+    def reservation_timer(self, starts_at):
+        try:
             # Calculate time difference
-            time_diff = res_time - ph_time
+            total_seconds = starts_at - now_epoch()
 
             # Check if reservation is within 1 hour and in the future
-            if time_diff.total_seconds() <= 0 or time_diff.total_seconds() > 3600:
+            if total_seconds <= 0 or total_seconds > 3600:
                 return None
 
             # Format the countdown timer
-            total_seconds = int(time_diff.total_seconds())
             minutes = total_seconds // 60
             seconds = total_seconds % 60
 
@@ -723,24 +728,18 @@ class HomePage(tk.Frame):
             print(f"Timer calculation error: {e}")
             return None
 
-    def grace_period_timer(self, grace_period_until_str):
+    def grace_period_timer(self, grace_ends_at):
         """Handle the 15-minute grace period using the stored end time"""
         try:
-            if not grace_period_until_str:
+            if not grace_ends_at:
                 return None
 
-            # Parse the grace period end time
-            grace_end_time = datetime.strptime(grace_period_until_str, "%m-%d-%Y %H:%M")
-            current_time = datetime.now()
-
             # Calculate remaining time
-            time_diff = grace_end_time - current_time
+            total_seconds = grace_ends_at - now_epoch()
 
-            if time_diff.total_seconds() <= 0:
+            if total_seconds <= 0:
                 return None, True  # Grace period expired
 
-            # Calculate remaining time
-            total_seconds = int(time_diff.total_seconds())
             minutes = total_seconds // 60
             seconds = total_seconds % 60
 
@@ -757,17 +756,20 @@ class HomePage(tk.Frame):
         """Set the is_late flag to True and calculate grace period end time"""
         try:
             # Calculate grace period end time (15 minutes from now)
-            grace_end_time = datetime.now() + timedelta(minutes=16)
-            grace_end_str = grace_end_time.strftime("%m-%d-%Y %H:%M")
+            grace_ends_at = now_epoch() + 16 * 60
 
-            # Update database with is_late=True and grace_period_until
-            update_reservation_late_status(reservation_id, grace_end_str)
-            print(f"Reservation {reservation_id} marked as late with grace period until {grace_end_str}")
+            # Update database with is_late=True and grace_ends_at
+            update_reservation_late_status(reservation_id, grace_ends_at)
+            print(f"Reservation {reservation_id} marked as late with grace period until {from_epoch(grace_ends_at):%m-%d-%Y %H:%M}")
         except Exception as e:
             print(f"Error setting reservation late status: {e}")
 
-    def fetch_database(self, event):
+    def fetch_database(self, event, force=False):
         try:
+            # Countdown windows open with the clock rather than a write, so the scheduler forces those refreshes
+            if not self.changes.changed(*HOME_TABLES) and not force:
+                return
+
             self.car_owners = sorted([name[1] for name in get_car_owners()])
             self.vehicles = sorted([plate[2] for plate in get_vehicles()])
             self.park_slots = sorted([slot for slot in get_parking_slots()])
@@ -777,39 +779,23 @@ class HomePage(tk.Frame):
             self.dropdown_plate_number.config(values=self.vehicles)
             self.dropdown_park_slot.config(values=self.slot_numbers)
 
-            timer_expired = False
+            self.next_reservations = get_next_reservations()
+            self.slot_rows = {slot[1]: slot for slot in self.park_slots}
+            self.countdown_slots = []
 
             for slot in self.park_slots:
                 slot_number = slot[1]
                 slot_status = slot[2]
-                print(slot)
 
-                prev_status = (self.previous_slot_status.get(slot_number), get_res_id_details(slot_number))
-                has_reservation = get_res_id_details(slot_number)
-                current_status = (slot_status, has_reservation)
-
-                timer_text = None
-                grace_timer_text = None
-                just_expired = False
+                has_reservation = self.next_reservations.get(slot_number)
 
                 upcoming_reservation = False
 
                 if has_reservation:
-                    res_date = datetime.strptime(has_reservation[7], "%m-%d-%Y")
-                    res_time = datetime.strptime(has_reservation[8], "%H:%M")
-
-                    current_date = datetime.now().date()
-                    current_time = datetime.now().time()
-
-                    if res_date.date() == current_date:
-                        # Fix: Use reservation time, not current time
-                        reservation_datetime = datetime.combine(res_date.date(), res_time.time())
-                        current_datetime = datetime.now()
-
-                        time_diff = reservation_datetime - current_datetime
+                    time_diff = has_reservation[13] - now_epoch()
 
-                        if 0 <= time_diff.total_seconds() <= 3600:
-                            upcoming_reservation = True
+                    if 0 <= time_diff <= 3600:
+                        upcoming_reservation = True
 
                 fgcolor = "white"
                 bgcolor = "green"  # Default color
@@ -828,47 +814,16 @@ class HomePage(tk.Frame):
                 else:
                     bgcolor = "green"
 
-                if has_reservation:
-                    if has_reservation[11]:  # is_late is True - show grace period timer (index 11)
-                        grace_result = self.grace_period_timer(has_reservation[12])  # grace_period_until at index 12
-                        if grace_result:
-                            grace_timer_text, grace_expired = grace_result
-                            if grace_expired:
-                                # Grace period expired - cancel the reservation
-                                print(
-                                    f"Grace period expired for reservation {has_reservation[0]} in slot {slot_number}")
-                                if cancel_accepted_reservation(has_reservation[0]):
-                                    print(f"Reservation {has_reservation[0]} cancelled successfully")
-                                else:
-                                    print(f"Failed to cancel reservation {has_reservation[0]}")
-                                timer_expired = True
-                    else:  # Normal reservation timer
-                        timer_result = self.reservation_timer(has_reservation[7], has_reservation[8])
-                        if timer_result:
-                            timer_text, just_expired = timer_result
-                            if just_expired:
-                                # Set is_late to True
-                                self.set_reservation_late(has_reservation[0])
-                                timer_expired = True
-
-                # Display appropriate text based on timer state
-                if grace_timer_text:
-                    if slot_status == 0:
-                        pkg_text = f"{slot_number}\nAvailable\nGrace period: {grace_timer_text}"
-                    else:
-                        pkg_text = f"{slot_number}\n{slot[5]}\n{slot[3]}\nGrace period: {grace_timer_text}"
-                elif timer_text and not timer_expired:
-                    if slot_status == 0:
-                        pkg_text = f"{slot_number}\nAvailable\nReservation in: {timer_text}"
-                    else:
-                        pkg_text = f"{slot_number}\n{slot[5]}\n{slot[3]}\nReservation in: {timer_text}"
-                else:
-                    pkg_text = f"{slot_number}\nAvailable\n" if slot_status == 0 else f"{slot_number}\n{slot[5]}\n{slot[3]}"
+                pkg_text, has_countdown = self._slot_text(slot, has_reservation)
+
+                if has_countdown:
+                    self.countdown_slots.append(slot_number)
 
                 if slot_number in self.park_slot_buttons:
                     self.park_slot_buttons[slot_number].config(text=pkg_text, bg=bgcolor, fg=fgcolor)
 
-                self.previous_slot_status[slot_number] = (slot_status, has_reservation)
+            # Late-marking and grace expiry are driven from here by update_timers_only
+            self.scheduler.sync(self.next_reservations)
         except Exception as e:
             print(f"Fetch Error!", e)
 
@@ -1078,10 +1033,22 @@ class ReservationsPage(tk.Frame):
         self._initialize_action_widgets()
         self._initialize_buttons()
         self._create_table()
-        self.fetch_reservations()
+        self.next_page_cursor = None
+        self.table_revision = None
+        self.loaded_keys = []
+        self.row_keys = {}
+        self.filters = {}
+        self.changes = ChangeTracker()
+        self.refresh_data()
 
     def refresh_data(self):
-        self.fetch_reservations()
+        changed = self.changes.poll()
+
+        if "parking_slots" in changed:
+            self.park_slots = sorted([slot for slot in get_parking_slots()])
+
+        if "reservations" in changed:
+            self.sync_reservations()
 
     def _initialize_inner_frames(self):
         self.reservation_manager = tk.Frame(self, bg="#b80000", padx=10, pady=10)
@@ -1115,6 +1082,54 @@ class ReservationsPage(tk.Frame):
         for i in range(1, 7, 2):
             self.frame_legend.columnconfigure(i, weight=1)
 
+        self.status_filter = ttk.Combobox(self.frame_legend, values=("All", "PENDING", "APPROVED", "REJECTED"),
+                                          state="readonly", width=10)
+        self.status_filter.set("All")
+        self.status_filter.grid(row=1, column=7, sticky="ne", padx=(10, 0))
+        self.status_filter.bind("<<ComboboxSelected>>", lambda event: self.fetch_reservations())
+
+        tk.Label(self.frame_legend, bg="#b80000", fg="white", text="From", font=self.master.login_font, padx=10).grid(row=1, column=8, sticky="ne")
+        self.date_from_filter = ttk.Entry(self.frame_legend, width=11)
+        self.date_from_filter.grid(row=1, column=9, sticky="ne")
+
+        tk.Label(self.frame_legend, bg="#b80000", fg="white", text="To", font=self.master.login_font, padx=10).grid(row=1, column=10, sticky="ne")
+        self.date_to_filter = ttk.Entry(self.frame_legend, width=11)
+        self.date_to_filter.grid(row=1, column=11, sticky="ne")
+
+        for entry in (self.date_from_filter, self.date_to_filter):
+            entry.bind("<Return>", lambda event: self.apply_filters())
+            entry.bind("<FocusOut>", lambda event: self.apply_filters())
+
+        tk.Label(self.frame_legend, bg="#b80000", fg="white", text="Slot", font=self.master.login_font, padx=10).grid(row=1, column=12, sticky="ne")
+        self.slot_filter = ttk.Combobox(self.frame_legend, values=("All",) + tuple(slot[1] for slot in sorted(get_parking_slots() or [])),
+                                        state="readonly", width=6)
+        self.slot_filter.set("All")
+        self.slot_filter.grid(row=1, column=13, sticky="ne")
+        self.slot_filter.bind("<<ComboboxSelected>>", lambda event: self.fetch_reservations())
+
+    def apply_filters(self):
+        # Leaving a date box unchanged should not reload the table
+        if self.reservation_filters() != self.filters:
+            self.fetch_reservations()
+
+    def reservation_filters(self):
+        """The filters picked above the table, as get_reservations_page keyword arguments."""
+        status = self.status_filter.get()
+        slot_number = self.slot_filter.get()
+        filters = {"status": None if status == "All" else status, "slot_number": None if slot_number in ("", "All") else slot_number}
+
+        for key, entry in (("date_from", self.date_from_filter), ("date_to", self.date_to_filter)):
+            text = entry.get().strip()
+
+            try:
+                filters[key] = datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d") if text else None
+            except ValueError:
+                entry.delete(0, "end")
+                filters[key] = None
+                messagebox.showerror("Error", "Enter dates as YYYY-MM-DD.")
+
+        return filters
+
     def _initialize_frame_titles(self):
         tk.Frame(self.reservation_manager, bg="#b80000", height=50).grid(row=0, column=0, sticky="w")
         tk.Label(self.reservation_manager, text="Manage Reservations", bg="#b80000", fg="white", font=self.master.header_font).place(x=0, y=0)
@@ -1194,6 +1209,63 @@ class ReservationsPage(tk.Frame):
                                    command=self.fetch_reservations)
         refresh_button.grid(row=7, column=0, columnspan=3, sticky="nsew")
 
+        tk.Frame(self.reservations_actions, height=5, bg="#8f0000").grid(row=8, column=0, sticky="nsew")
+
+        auto_assign_button = tk.Button(self.reservations_actions, text="Auto-Assign Pending", bg="#ffcc00", fg="black",
+                                       relief="flat", command=self.auto_assign_window)
+        auto_assign_button.grid(row=9, column=0, columnspan=3, sticky="nsew")
+
+    def auto_assign_window(self):
+        preview = preview_auto_assign()
+
+        if preview is None:
+            messagebox.showerror("Error", "Could not plan slot assignments.")
+            return
+
+        if not preview["assignments"]:
+            messagebox.showinfo("Auto-Assign", f"No pending reservation fits a free slot ({len(preview['unassigned'])} pending).")
+            return
+
+        window = tk.Toplevel(self.reservations_actions, bg="#e6e6e6", padx=10, pady=10)
+        window.title("Auto-Assign Preview")
+        window.geometry("700x500")
+
+        tk.Label(window, text=f"{len(preview['assignments'])} reservations will be approved, "
+                              f"{len(preview['unassigned'])} stay pending.",
+                 bg="#e6e6e6", font=self.master.subheader_font).pack(anchor="w", pady=(0, 5))
+
+        columns = ("ID", "Name", "Plate Number", "Vehicle Type", "Reservation Date", "Reservation Time", "Slot")
+        table = ttk.Treeview(window, columns=columns, show="headings", style="Custom.Treeview")
+
+        for col in columns:
+            table.heading(col, text=col, anchor="w")
+            table.column(col, width=90, minwidth=40)
+
+        rows = get_reservations_by_id(reservation_id for reservation_id, _ in preview["assignments"])
+
+        for reservation_id, slot_number in preview["assignments"]:
+            reservation = rows.get(reservation_id)
+
+            if reservation:
+                table.insert("", "end", values=(reservation[0], reservation[1], reservation[5], reservation[6],
+                                                reservation[7], reservation[8], slot_number))
+
+        table.pack(fill="both", expand=True)
+
+        def approve():
+            approved = apply_auto_assign(preview)
+
+            if approved is None:
+                messagebox.showerror("Error", "Reservations changed since this preview. Run Auto-Assign again.")
+            else:
+                messagebox.showinfo("Success", f"{approved} reservations approved.")
+                self.sync_reservations()
+
+            window.destroy()
+
+        tk.Button(window, text="Approve All", bg="green", fg="white", relief="flat",
+                  command=approve).pack(fill="x", pady=(5, 0))
+
     def slot_selection_window(self):
         window = tk.Toplevel(self.reservations_actions, bg="#e6e6e6")
         window.title("Assign Slot to Reservation")
@@ -1208,28 +1280,37 @@ class ReservationsPage(tk.Frame):
         j = 0
         i = 1
         park_slot_buttons = {}
+        next_reservations = get_next_reservations()
+
+        # With a reservation selected, only slots free for its whole window that fit its vehicle can be picked
+        free_slots = None
+        selection = self.reservation_table.selection()
+
+        if selection:
+            reservation_values = self.reservation_table.item(selection[0], 'values')
+            window_times = get_reservation_window(reservation_values[0])
+
+            if window_times and None not in window_times:
+                free = get_free_slots(*window_times, vehicle_type=reservation_values[6])
+
+                # Fall back to today's view; accepting still checks the slot inside its transaction.
+                if free is None:
+                    messagebox.showerror("Error", "Could not check which slots are free for that reservation.")
+                else:
+                    free_slots = set(free)
 
         for slot in self.park_slots:
             slot_number = slot[1]
             slot_status = slot[2]
-            has_reservation = get_res_id_details(slot_number)
+            has_reservation = next_reservations.get(slot_number)
 
             upcoming_reservation = False
 
             if has_reservation:
-                res_date = datetime.strptime(has_reservation[7], "%m-%d-%Y")
-                res_time = datetime.strptime(has_reservation[8], "%H:%M")
-
-                current_date = datetime.now().date()
+                time_diff = has_reservation[13] - now_epoch()
 
-                if res_date.date() == current_date:
-                    reservation_datetime = datetime.combine(res_date.date(), res_time.time())
-                    current_datetime = datetime.now()
-
-                    time_diff = reservation_datetime - current_datetime
-
-                    if 0 <= time_diff.total_seconds() <= 3600:
-                        upcoming_reservation = True
+                if 0 <= time_diff <= 3600:
+                    upcoming_reservation = True
 
             fgcolor = "white"
 
@@ -1243,17 +1324,14 @@ class ReservationsPage(tk.Frame):
             else:
                 bgcolor = "green"
 
-            has_reservation_today = False
-            if has_reservation:
-                res_date = datetime.strptime(has_reservation[7], "%m-%d-%Y")
-                current_date = datetime.now().date()
-
-                if res_date.date() == current_date:
-                    has_reservation_today = True
+            if free_slots is not None:
+                slot_taken = slot_number not in free_slots
+            else:
+                slot_taken = bool(has_reservation) and from_epoch(has_reservation[13]).date() == from_epoch(now_epoch()).date()
 
             pkg_text = f"{slot_number}\nAvailable\n" if slot_status == 0 else f"{slot_number}\n{slot[5]}\n{slot[3]}"
 
-            button_state = "disabled" if has_reservation_today else "normal"
+            button_state = "disabled" if slot_taken else "normal"
 
             button = tk.Button(frame_park_slots, text=pkg_text, bg=bgcolor, fg=fgcolor, width=20,
                                command=lambda x=slot[1]: self.select_slot_for_reservation(x, window),
@@ -1292,10 +1370,16 @@ class ReservationsPage(tk.Frame):
             if reservation_values[9] != "PENDING":
                 raise Exception(messagebox.showerror("Error", "That reservation is already approved or rejected."))
 
-            if accept_reservation(reservation_values[0], slot_number):
+            accepted = accept_reservation(reservation_values[0], slot_number)
+
+            if accepted:
                 messagebox.showinfo("Success", f"Reservation {reservation_values[0]} is accepted and assigned to {slot_number}")
                 self.selected_slot.set("None")
-                self.fetch_reservations()
+                self.sync_reservations()
+            elif accepted is None:
+                messagebox.showerror("Error", f"Reservation {reservation_values[0]} could not be accepted. Refresh the list and try again.")
+            else:
+                messagebox.showerror("Error", f"Slot {slot_number} is already reserved during that time.")
         except Exception as e:
             print(f"Error Occurred!", e)
 
@@ -1313,7 +1397,7 @@ class ReservationsPage(tk.Frame):
 
             if reject_reservation(reservation_values[0]):
                 messagebox.showinfo("Success", f"Reservation {reservation_values[0]} is rejected.")
-                self.fetch_reservations()
+                self.sync_reservations()
         except Exception as e:
             print(f"Error Occurred!", e)
 
@@ -1353,7 +1437,7 @@ class ReservationsPage(tk.Frame):
         h_scrollbar = ttk.Scrollbar(self.reservation_manager, orient="horizontal",
                                     command=self.reservation_table.xview)
 
-        self.reservation_table.configure(yscrollcommand=v_scrollbar.set,
+        self.reservation_table.configure(yscrollcommand=lambda first, last: self.on_table_scroll(v_scrollbar, first, last),
                                          xscrollcommand=h_scrollbar.set)
 
         self.reservation_table.tag_configure('pending', background="#fe9705", foreground="white")
@@ -1377,28 +1461,92 @@ class ReservationsPage(tk.Frame):
         for i, results in enumerate(self.details.values(), start=1):
             results.set(values[i])
 
+    def on_table_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+
+        # Fetch the next page while the user is still a few screens away from the end
+        if self.next_page_cursor and float(last) > 0.8:
+            self.load_reservation_page()
+
+    def load_reservation_page(self):
+        reservations_data = get_reservations_page(self.next_page_cursor, RESERVATION_PAGE_ROWS, **self.filters)
+
+        self.next_page_cursor = reservation_cursor(reservations_data[-1]) if len(reservations_data) == RESERVATION_PAGE_ROWS else None
+
+        for reservations in reservations_data:
+            if self.reservation_table.exists(str(reservations[0])):
+                continue
+
+            self.row_keys[reservations[0]] = table_key(*reservation_cursor(reservations))
+            self.loaded_keys.append(table_key(*reservation_cursor(reservations)))
+            self.reservation_table.insert("", "end", iid=str(reservations[0]), values=reservations,
+                                          tags=(reservation_tag(reservations),))
+
     def fetch_reservations(self):
         try:
             self.park_slots = sorted([slot for slot in get_parking_slots()])
 
+            # Taken before the first page, so writes racing the reload are replayed by the next sync
+            self.table_revision = get_reservation_revision()
+
             self.reservation_table.delete(*self.reservation_table.get_children())
 
-            reservations_data = get_reservations()
+            self.loaded_keys = []
+            self.row_keys = {}
+            self.next_page_cursor = None
+            self.filters = self.reservation_filters()
+            self.load_reservation_page()
+        except Exception as e:
+            print(f"Error fetching reservations: {e}")
+
+    def sync_reservations(self):
+        """Apply reservation writes since the last sync to the loaded rows, one row at a time"""
+        try:
+            changes = get_reservation_changes(self.table_revision) if self.table_revision is not None else None
 
-            if not reservations_data:
+            if changes is None:
+                self.fetch_reservations()
                 return
 
-            for i, reservations in enumerate(reservations_data):
-                if reservations[9] == "PENDING":
-                    tag = "pending"
-                elif reservations[9] == "APPROVED":
-                    tag = "approved"
-                else:
-                    tag = "rejected"
+            self.table_revision = changes["revision"]
+
+            for reservation_id in changes["deleted"]:
+                self.remove_reservation_row(reservation_id)
 
-                self.reservation_table.insert("", "end", values=reservations, tags=(tag,))
+            for reservations in changes["changed"]:
+                self.apply_reservation_row(reservations)
+
+            self.on_table_selection(None)
         except Exception as e:
-            print(f"Error fetching reservations: {e}")
+            print(f"Error syncing reservations: {e}")
+
+    def remove_reservation_row(self, reservation_id):
+        key = self.row_keys.pop(reservation_id, None)
+
+        if key is None:
+            return
+
+        del self.loaded_keys[bisect_left(self.loaded_keys, key)]
+        self.reservation_table.delete(str(reservation_id))
+
+    def apply_reservation_row(self, reservations):
+        key = table_key(*reservation_cursor(reservations))
+        wanted = reservation_matches(reservations, self.filters)
+
+        if wanted and self.row_keys.get(reservations[0]) == key:
+            self.reservation_table.item(str(reservations[0]), values=reservations, tags=(reservation_tag(reservations),))
+            return
+
+        self.remove_reservation_row(reservations[0])
+
+        # Rows past the last loaded page arrive with the page that covers them
+        if wanted and (self.next_page_cursor is None or key <= table_key(*self.next_page_cursor)):
+            index = bisect_left(self.loaded_keys, key)
+
+            self.loaded_keys.insert(index, key)
+            self.row_keys[reservations[0]] = key
+            self.reservation_table.insert("", index, iid=str(reservations[0]), values=reservations,
+                                          tags=(reservation_tag(reservations),))
 
 
 class VehiclesPage(tk.Frame):